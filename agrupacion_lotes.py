@@ -0,0 +1,151 @@
+from ortools_sergar import planificar_produccion
+from utils import duracion_en_jornadas
+
+
+def _clave_lote(pedido_id: str, data: dict) -> tuple:
+    """
+    Clave de agrupación: líneas del mismo pedido con el mismo artículo,
+    familia, fecha de entrega y ruta de procesos.
+    """
+    if data.get('numero_pedido') is None or data.get('iniciados'):
+        # Sin número de pedido no se puede saber qué líneas son compatibles,
+        # y las que ya están en curso se planifican solas
+        return (pedido_id,)
+
+    ruta = tuple((proceso_info[0], proceso_info[2]) for proceso_info in data['procesos'])
+    return (data['numero_pedido'], data['nombre'], data.get('familia'), data['fecha_entrega'], ruta)
+
+
+def agrupar_lotes(pedidos: dict) -> tuple[dict, dict]:
+    """
+    Agrupa las líneas compatibles en lotes antes de planificar.
+
+    Cada lote tiene la misma ruta que sus líneas y, en cada proceso, la suma
+    de sus duraciones en jornadas, de modo que el modelo tiene una cadena de
+    tareas por lote en lugar de una por línea. Las líneas pasan por todos los
+    procesos en el mismo orden, así que cada proceso del lote puede empezar
+    en cuanto la primera línea termina el anterior: el desfase mínimo entre
+    inicios se guarda en "desfases".
+
+    Args:
+        pedidos (dict): Diccionario con los pedidos a planificar
+
+    Returns:
+        tuple[dict, dict]: (pedidos agrupados, composición {lote: [pedidos]})
+    """
+    grupos = {}
+    for pedido_id, data in pedidos.items():
+        grupos.setdefault(_clave_lote(pedido_id, data), []).append(pedido_id)
+
+    lotes = {}
+    composicion = {}
+    for miembros in grupos.values():
+        primero = pedidos[miembros[0]]
+        if len(miembros) == 1:
+            lotes[miembros[0]] = primero
+            composicion[miembros[0]] = miembros
+            continue
+
+        lote_id = f"lote-{miembros[0]}"
+        duraciones = [
+            [duracion_en_jornadas(pedidos[m]['procesos'][i][1]) for m in miembros]
+            for i in range(len(primero['procesos']))
+        ]
+
+        procesos = []
+        for i, (proceso, _, subproceso, ot, operario) in enumerate(primero['procesos']):
+            procesos.append([proceso, sum(duraciones[i]), subproceso, ot, operario])
+
+        # Cada línea debe acabar un proceso antes de empezar el siguiente
+        desfases = []
+        for actual, siguiente in zip(duraciones, duraciones[1:]):
+            desfase = 0
+            acumulado_actual = acumulado_siguiente = 0
+            for duracion_actual, duracion_siguiente in zip(actual, siguiente):
+                desfase = max(desfase, acumulado_actual + duracion_actual - acumulado_siguiente)
+                acumulado_actual += duracion_actual
+                acumulado_siguiente += duracion_siguiente
+            desfases.append(desfase)
+
+        lotes[lote_id] = {
+            **primero,
+            "cantidad": sum(pedidos[m]['cantidad'] for m in miembros),
+            "procesos": procesos,
+            "desfases": desfases
+        }
+        composicion[lote_id] = miembros
+
+    return lotes, composicion
+
+
+def expandir_plan(plan: list, pedidos: dict, composicion: dict) -> list:
+    """
+    Reparte el plan de cada lote entre sus líneas.
+
+    Dentro de cada tarea del lote las líneas se encadenan una tras otra en el
+    orden del lote, lo que respeta la ruta de cada línea y el no solapamiento
+    del proceso.
+
+    Args:
+        plan (list): Plan devuelto por `planificar_produccion` sobre los lotes
+        pedidos (dict): Pedidos originales, por línea
+        composicion (dict): Composición devuelta por `agrupar_lotes`
+
+    Returns:
+        list: Plan con una tarea por línea y proceso, en el formato de `planificar_produccion`
+    """
+    plan_expandido = []
+    for inicio, lote, i, nombre, duracion, proceso, subproceso, ot, operario in plan:
+        miembros = composicion[lote]
+        if miembros == [lote]:
+            plan_expandido.append((inicio, lote, i, nombre, duracion, proceso, subproceso, ot, operario))
+            continue
+
+        for pedido in miembros:
+            duracion_pedido = duracion_en_jornadas(pedidos[pedido]['procesos'][i][1])
+            plan_expandido.append((
+                inicio,
+                pedido,
+                i,
+                pedidos[pedido]['nombre'],
+                duracion_pedido,
+                proceso,
+                subproceso,
+                pedidos[pedido]['procesos'][i][3],
+                operario
+            ))
+            inicio += duracion_pedido
+
+    plan_expandido.sort()
+    return plan_expandido
+
+
+def planificar_por_lotes(pedidos: dict, **kwargs) -> tuple:
+    """
+    Planifica agrupando antes las líneas en lotes y expande el resultado.
+
+    Un lote obliga a sus líneas a ir seguidas en cada proceso; si con esa
+    restricción el modelo es inviable, se planifica de nuevo línea a línea.
+    Si el solver agota el tiempo sin solución no se reintenta: el modelo por
+    líneas es mayor y tardaría aún más.
+
+    Args:
+        pedidos (dict): Diccionario con los pedidos a planificar
+        **kwargs: Argumentos adicionales para `planificar_produccion`
+
+    Returns:
+        tuple: (plan, makespan, status) como `planificar_produccion`
+    """
+    lotes, composicion = agrupar_lotes(pedidos)
+    if len(lotes) == len(pedidos):
+        return planificar_produccion(pedidos, **kwargs)
+
+    from ortools.sat.python import cp_model
+
+    plan, makespan, status = planificar_produccion(lotes, **kwargs)
+    if status == cp_model.INFEASIBLE:
+        return planificar_produccion(pedidos, **kwargs)
+    if plan is None:
+        return None, None, status
+
+    return expandir_plan(plan, pedidos, composicion), makespan, status
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+def _barrido(codigos: np.ndarray, desde: np.ndarray, hasta: np.ndarray, n_recursos: int, n_jornadas: int) -> np.ndarray:
+    """
+    Cuenta, por recurso y jornada, los intervalos [desde, hasta) activos.
+
+    Suma +1 al inicio y -1 al final de cada intervalo en una matriz de
+    diferencias y acumula por jornadas: O(n + recursos * jornadas).
+    """
+    ancho = n_jornadas + 1
+    diferencias = (
+        np.bincount(codigos * ancho + desde, minlength=n_recursos * ancho)
+        - np.bincount(codigos * ancho + hasta, minlength=n_recursos * ancho)
+    )
+    return np.cumsum(diferencias.reshape(n_recursos, ancho), axis=1)[:, :n_jornadas]
+
+
+def analizar_capacidad(plan: list, por_subproceso: bool = False) -> dict:
+    """
+    Calcula la ocupación, la cola y los huecos de cada proceso por jornada.
+
+    - Ocupación: tareas en curso en el recurso (el planificador no solapa
+      tareas de un mismo proceso, así que coincide con la utilización).
+    - Cola: tareas cuyo proceso anterior en la ruta ya ha terminado pero que
+      todavía no han empezado en el recurso.
+    - Huecos: jornadas sin actividad entre la primera y la última tarea del recurso.
+
+    Args:
+        plan (list): Plan en el formato de `planificar_produccion`
+        por_subproceso (bool): Analizar cada máquina (proceso y subproceso) por separado
+
+    Returns:
+        dict: {
+            'recursos': etiquetas de cada fila,
+            'ocupacion': matriz recursos x jornadas,
+            'cola': matriz recursos x jornadas,
+            'huecos': [(recurso, inicio, fin), ...] con fin exclusivo,
+            'resumen': lista de dicts por recurso, de mayor a menor cola media
+        }
+    """
+    if not plan:
+        return {'recursos': [], 'ocupacion': np.zeros((0, 0)), 'cola': np.zeros((0, 0)), 'huecos': [], 'resumen': []}
+
+    inicio = np.fromiter((tarea[0] for tarea in plan), dtype=np.int64, count=len(plan))
+    duracion = np.fromiter((tarea[4] for tarea in plan), dtype=np.int64, count=len(plan))
+    orden = np.fromiter((tarea[2] for tarea in plan), dtype=np.int64, count=len(plan))
+    _, pedido = np.unique(np.array([str(tarea[1]) for tarea in plan]), return_inverse=True)
+    if por_subproceso:
+        etiquetas = np.array([f"{tarea[5]} - {tarea[6]}" for tarea in plan])
+    else:
+        etiquetas = np.array([tarea[5] for tarea in plan])
+    recursos, codigos = np.unique(etiquetas, return_inverse=True)
+    fin = inicio + duracion
+
+    # La tarea está lista cuando termina el proceso anterior de su pedido
+    por_ruta = np.lexsort((orden, pedido))
+    listo = np.zeros_like(inicio)
+    anterior, actual = por_ruta[:-1], por_ruta[1:]
+    encadenada = (pedido[anterior] == pedido[actual]) & (orden[anterior] == orden[actual] - 1)
+    listo[actual[encadenada]] = fin[anterior[encadenada]]
+    listo = np.minimum(listo, inicio)
+
+    n_recursos = len(recursos)
+    n_jornadas = int(fin.max())
+    ocupacion = _barrido(codigos, inicio, fin, n_recursos, n_jornadas)
+    cola = _barrido(codigos, listo, inicio, n_recursos, n_jornadas)
+
+    primera = np.full(n_recursos, n_jornadas)
+    np.minimum.at(primera, codigos, inicio)
+    ultima = np.zeros(n_recursos, dtype=np.int64)
+    np.maximum.at(ultima, codigos, fin)
+
+    huecos = []
+    resumen = []
+    for r, recurso in enumerate(recursos):
+        activo = ocupacion[r, primera[r]:ultima[r]] > 0
+        cambios = np.flatnonzero(np.diff(np.concatenate(([1], activo.astype(np.int8), [1]))))
+        huecos.extend(
+            (recurso, int(primera[r] + a), int(primera[r] + b))
+            for a, b in zip(cambios[::2], cambios[1::2])
+        )
+
+        jornadas_activas = max(int(ultima[r] - primera[r]), 1)
+        resumen.append({
+            'recurso': recurso,
+            'tareas': int(np.count_nonzero(codigos == r)),
+            'utilizacion_media': float(ocupacion[r].sum() / jornadas_activas),
+            'cola_media': float(cola[r].sum() / jornadas_activas),
+            'cola_maxima': int(cola[r].max()),
+            'jornadas_ociosas': int(jornadas_activas - np.count_nonzero(activo))
+        })
+
+    # Donde más tareas esperan es donde más rinde añadir capacidad
+    resumen.sort(key=lambda fila: (fila['cola_media'], fila['utilizacion_media']), reverse=True)
+
+    return {
+        'recursos': recursos.tolist(),
+        'ocupacion': ocupacion,
+        'cola': cola,
+        'huecos': huecos,
+        'resumen': resumen
+    }
@@ -1,28 +1,32 @@
 import streamlit as st
 import pandas as pd
-import plotly.figure_factory as ff
-from datetime import datetime, timedelta
-import json
-from ortools_sergar import planificar_produccion
-import plotly.graph_objects as go
-from google.cloud import bigquery
+import numpy as np
+from datetime import datetime
 import os
-from ortools.sat.python import cp_model
 from dotenv import load_dotenv
 from typing import Dict, List, Tuple, Any
 from utils import (
     procesar_nombre_proceso,
-    completar_datos_procesos,
-    calcular_fechas_limite_internas,
-    calcular_prioridad,
+    preparar_lote,
+    calcular_prioridades_lote,
+    calcular_fechas_limite_lote,
     MAPEO_PROCESOS,
     MAPEO_SUBPROCESOS,
-    SECUENCIA_PROCESOS,
     SUBPROCESOS_VALIDOS
 )
-
+from calendario import CalendarioLaboral
+from coordinador import CoordinadorPlanificacion
+from presolve import analizar_pedidos
+from analitica import analizar_capacidad
+from progreso import RegistroProgreso, INICIO, FIN
+from validacion import validar_plan
+from perfilado import iniciar_perfil, guardar_perfil
 from processing.transformations import process_data
-from bigquery.uploader import load_sales_orders, load_sales_orders_table
+from processing.articles import compact_articles, decode_it_flags, route_for_mask
+from bigquery.reader import read_articles, read_articles_arrow
+
+# Plotly, OR-Tools y el cliente de BigQuery se importan en el primer uso
+# para no retrasar el arranque ni cada recarga del script
 
 # Cargar variables de entorno
 load_dotenv()
@@ -42,51 +46,96 @@ TABLE_NAME_SALES_ORDERS = os.getenv('BIGQUERY_TABLE_NAME_SALES_ORDERS', 'sales_o
 TABLE_ID = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_NAME}"
 CREDENTIALS_PATH = os.getenv('BIGQUERY_CREDENTIALS_PATH')
 
-# Crear cliente de BigQuery desde el archivo de credenciales
+# Segundos que se reutilizan los pedidos leídos de BigQuery entre recargas
+CACHE_TTL_SEGUNDOS = int(os.getenv('SERGAR_CACHE_TTL', '300'))
+# Ruta opcional para volcar df_expanded a CSV (desactivado si no se define)
+DEBUG_CSV_PATH = os.getenv('SERGAR_DEBUG_CSV')
+# Flujos paralelos de la BigQuery Storage Read API
+BQ_STREAMS = int(os.getenv('SERGAR_BQ_STREAMS', '4'))
+# Archivo JSON con turnos, festivos y paradas (opcional)
+CALENDARIO_PATH = os.getenv('SERGAR_CALENDARIO')
+# Base de datos SQLite con el registro de avance de planta
+PROGRESO_PATH = os.getenv('SERGAR_PROGRESO_DB', 'progreso.db')
+# Resolver con varias configuraciones de CP-SAT en paralelo
+PORTAFOLIO_SOLVER = os.getenv('SERGAR_PORTAFOLIO_SOLVER', '0') == '1'
+# Perfilar cada ejecución del script y carpeta donde guardar los perfiles
+PERFILAR = os.getenv('SERGAR_PERFILAR', '0') == '1'
+PERFIL_DIR = os.getenv('SERGAR_PERFIL_DIR', 'perfiles')
+
+# Perfilar esta ejecución si se pidió por entorno o desde las opciones de depuración
+perfil = iniciar_perfil() if PERFILAR or st.session_state.get('perfilar', False) else None
+
+
+@st.cache_resource
+def obtener_cliente_bigquery(credentials_path: str):
+    """Crea el cliente de BigQuery una sola vez por proceso."""
+    from google.cloud import bigquery
+
+    return bigquery.Client.from_service_account_json(credentials_path, location="europe-southwest1")
+
+
+@st.cache_resource
+def obtener_cliente_lectura(credentials_path: str):
+    """Crea el cliente de la Storage Read API, o None si la librería no está instalada."""
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+
+    return bigquery_storage.BigQueryReadClient.from_service_account_json(credentials_path)
+
+
+@st.cache_resource
+def obtener_calendario(fecha_inicio: datetime, ruta: str) -> CalendarioLaboral:
+    """Construye el calendario laboral y su índice de jornadas una sola vez."""
+    if ruta:
+        return CalendarioLaboral.desde_json(ruta, fecha_inicio)
+    return CalendarioLaboral(fecha_inicio)
+
+
+@st.cache_resource
+def obtener_registro_progreso(ruta: str) -> RegistroProgreso:
+    """Abre el registro de avance compartido por todas las sesiones."""
+    return RegistroProgreso(ruta)
+
+
+@st.cache_resource
+def obtener_coordinador() -> CoordinadorPlanificacion:
+    """Coordinador único: todas las sesiones comparten el mismo plan."""
+    return CoordinadorPlanificacion()
+
+
+@st.cache_data(ttl=CACHE_TTL_SEGUNDOS, show_spinner="Cargando pedidos...")
+def cargar_articulos(table_id: str) -> pd.DataFrame:
+    """Lee los pedidos de BigQuery expandidos a una fila por artículo, en formato compacto."""
+    cliente_lectura = obtener_cliente_lectura(CREDENTIALS_PATH)
+    if cliente_lectura is not None:
+        # Lectura en Arrow por flujos paralelos
+        df_expanded = read_articles_arrow(cliente_lectura, table_id, max_streams=BQ_STREAMS)
+    else:
+        df_expanded = read_articles(obtener_cliente_bigquery(CREDENTIALS_PATH), table_id)
+
+    # Guardar df_expanded en un archivo CSV para revisión (opcional)
+    if DEBUG_CSV_PATH:
+        df_expanded.to_csv(DEBUG_CSV_PATH, index=False, encoding='utf-8')
+
+    # Procesos IT como máscara de bits y textos repetidos como categorías
+    return compact_articles(df_expanded)
+
+
 try:
-    client = bigquery.Client.from_service_account_json(CREDENTIALS_PATH, location="europe-southwest1")
-    
-    # Realizar la consulta
-    query = f'SELECT * FROM `{TABLE_ID}`'
-    query_job = client.query(query)
-    results = query_job.result()
-
-    # Convertir resultados a DataFrame
-    df = results.to_dataframe()
-
-    # Expandir el campo articulos
-    df = df.explode('articulos')
-
-    # Convertir la columna articulos de string a diccionario si es necesario
-    if isinstance(df['articulos'].iloc[0], str):
-        df['articulos'] = df['articulos'].apply(json.loads)
-
-    # Crear un nuevo DataFrame con los datos expandidos
-    df_expanded = pd.json_normalize(df['articulos'])
-
-    # Añadir la fecha de entrega del DataFrame original
-    df_expanded['fecha_entrega'] = df['fecha_entrega'].values
-
-    # Guardar df_expanded en un archivo CSV para revisión
-    df_expanded.to_csv('df_expanded.csv', index=False, encoding='utf-8')
-
-    
-    # Columnas del nuevo DataFrame:
-    #    Index(['nombre', 'OT_ID_Linea', 'familia', 'cantidad', 'importe',
-    #        'IT01_Dibujo', 'IT02_Pantalla', 'IT03_Corte', 'IT05_Grabado',
-    #        'IT06_Adhesivo', 'IT06_Laminado', 'IT07_Taladro', 'IT07_Can_romo',
-    #        'IT07_Numerado', 'IT08_Embalaje', 'IT04_Impresion._',
-    #        'IT04_Impresion.digital', 'IT04_Impresion.serigrafia',
-    #        'IT07_Mecanizado._', 'IT07_Mecanizado.plotter',
-    #        'IT07_Mecanizado.fresado', 'IT07_Mecanizado.laser',
-    #        'IT07_Mecanizado.semicorte', 'IT07_Mecanizado.plegado',
-    #        'IT07_Mecanizado.burbuja_teclas', 'IT07_Mecanizado.hendido',
-    #        'IT07_Mecanizado.cepillado'],
-    #    dtype='object') """
+    df_expanded = cargar_articulos(TABLE_ID)
 
     # Definir fecha de inicio y actual
     fecha_inicio = datetime(2024, 1, 1)  # Fecha base fija
-    fecha_actual = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    calendario = obtener_calendario(fecha_inicio, CALENDARIO_PATH)
+    registro = obtener_registro_progreso(PROGRESO_PATH)
+    coordinador = obtener_coordinador()
+
+    # Fechas de entrega en jornadas laborables desde la fecha base
+    df_expanded['jornadas_hasta_entrega'] = calendario.desplazamiento(
+        pd.to_datetime(df_expanded['fecha_entrega']).values.astype('datetime64[D]')
+    )
 
     # Sidebar para entrada de datos
     with st.sidebar:
@@ -95,86 +144,71 @@ try:
         # Opción para cargar pedidos desde Excel
         st.subheader("Cargar Pedidos en Exel")
         uploaded_excel_file = st.file_uploader("Cargar archivo Excel de pedidos", type=['xlsx'])
-        if uploaded_excel_file is not None:
+        # El archivo sigue en el uploader entre recargas: solo se carga una vez
+        if uploaded_excel_file is not None and st.session_state.get('excel_cargado') != (uploaded_excel_file.name, uploaded_excel_file.size):
             try:
+                from bigquery.uploader import load_sales_orders_parquet, load_sales_orders_table
+
                 df = pd.read_excel(uploaded_excel_file, decimal=",", date_format="%d/%m/%Y")
                 orders_list = process_data(df)
-                load_sales_orders(orders_list, CREDENTIALS_PATH, TABLE_ID) 
+                load_sales_orders_parquet(orders_list, CREDENTIALS_PATH, TABLE_ID)
                 load_sales_orders_table(df, CREDENTIALS_PATH, PROJECT_ID, DATASET_ID, TABLE_NAME_SALES_ORDERS)
+                st.session_state['excel_cargado'] = (uploaded_excel_file.name, uploaded_excel_file.size)
+                cargar_articulos.clear()
                 st.success("Archivo Excel cargado correctamente")
             except Exception as e:
                 st.error(f"Error al cargar el archivo Excel: {str(e)}")
 
     # Procesar los datos para la planificación
     pedidos: Dict[str, Dict[str, Any]] = {}
-    procesos_unicos: set = set()  # Conjunto para almacenar procesos únicos
-    
-    for _, row in df_expanded.iterrows():
-        pedido_id = str(row['OT_ID_Linea'])
-        
+    mascaras: Dict[str, Tuple[Any, int]] = {}  # OT -> (ID Línea, procesos IT de todas sus filas)
+
+    columnas = ['OT_ID_Linea', 'numero_pedido', 'nombre', 'familia', 'cantidad', 'jornadas_hasta_entrega', 'it_mask']
+    for ot, numero_pedido, nombre, familia, cantidad, jornadas, mascara in zip(
+        *(serie for _, serie in df_expanded.reindex(columns=columnas).items())
+    ):
+        pedido_id = str(ot)
+
         if pedido_id not in pedidos:
-            # Calcular días hasta la entrega desde la fecha base
-            fecha_entrega = pd.to_datetime(row['fecha_entrega'])
-            dias_hasta_entrega = (fecha_entrega - fecha_inicio).days
-            
-            # Asegurar que la fecha sea positiva
-            if dias_hasta_entrega < 0:
-                dias_hasta_entrega = 0
-            
             pedidos[pedido_id] = {
-                "nombre": row['nombre'],
-                "cantidad": row['cantidad'],
-                "fecha_entrega": dias_hasta_entrega,
+                "numero_pedido": numero_pedido if pd.notna(numero_pedido) else None,
+                "nombre": nombre,
+                "familia": familia,
+                "cantidad": cantidad,
+                "fecha_entrega": int(jornadas),
                 "procesos": []
             }
-        
-        # Procesar los procesos IT
-        for key, value in row.items():
-            if key.startswith('IT'):
-                # Separar el proceso y subproceso del nombre de la columna
-                if '.' in key:
-                    proceso, subproceso = key.split('.')
-                    if subproceso == '_':
-                        # Si es un proceso sin subproceso específico
-                        nombre_completo = proceso
-                        subproceso = "Sin Subproceso"
-                    else:
-                        nombre_completo = f"{proceso} {subproceso}"
-                else:
-                    # Si es un proceso simple sin subproceso
-                    nombre_completo = key
-                    subproceso = "Sin Subproceso"
-
-                if pd.notna(value) and value != '':
-                    procesos_unicos.add(nombre_completo)  # Añadir el proceso completo
-                    duracion = 1  # Por defecto
-                    ot = row.get('OT_ID_Linea', 'Sin OT')
-                    operario = "Por Asignar"
-                    
-                    # Verificar si el proceso ya existe
-                    if not any(p[0] == nombre_completo and p[2] == subproceso for p in pedidos[pedido_id]["procesos"]):
-                        pedidos[pedido_id]["procesos"].append([
-                            nombre_completo,  # nombre completo del proceso
-                            duracion,        # duracion
-                            subproceso,      # subproceso
-                            ot,             # ot (ID Linea)
-                            operario        # operario
-                        ])
-        
-        # Procesar los nombres de procesos y subprocesos
-        pedidos[pedido_id]["procesos"] = completar_datos_procesos({pedido_id: pedidos[pedido_id]})[pedido_id]["procesos"]
-        
-        # Ordenar los procesos según la secuencia predefinida
-        pedidos[pedido_id]["procesos"].sort(key=lambda x: SECUENCIA_PROCESOS.get(x[0], 999))
+            mascaras[pedido_id] = (ot, 0)
+        mascaras[pedido_id] = (mascaras[pedido_id][0], mascaras[pedido_id][1] | int(mascara))
+
+    # La ruta (ya ordenada por la secuencia de procesos) se calcula una vez por máscara
+    for pedido_id, (ot, mascara) in mascaras.items():
+        pedidos[pedido_id]["procesos"] = [
+            [proceso, 1, subproceso, ot, "Por Asignar"]
+            for proceso, subproceso in route_for_mask(mascara)
+        ]
 
-    # Ordenar pedidos por fecha de entrega y seleccionar los 5 más urgentes
-    pedidos_ordenados = sorted(pedidos.items(), key=lambda x: x[1]['fecha_entrega'])
-    pedidos_planificacion = dict(pedidos_ordenados[:5])
+    # Registrar la ruta de cada OT para conocer su avance real
+    for pedido_id, data in pedidos.items():
+        registro.registrar_ruta(pedido_id, [(p[0], p[2]) for p in data["procesos"]])
+
+    # Ordenar pedidos pendientes por fecha de entrega y seleccionar los 5 más urgentes
+    pedidos_ordenados = sorted(
+        ((pedido_id, data) for pedido_id, data in pedidos.items() if not registro.ot_finalizada(pedido_id)),
+        key=lambda x: x[1]['fecha_entrega']
+    )
+    # Se planifica solo lo que queda: sin procesos finalizados y con los iniciados fijados al principio
+    pedidos_planificacion = {}
+    posiciones_ruta = {}  # OT -> posición en la ruta completa de cada proceso planificado
+    for pedido_id, data in pedidos_ordenados[:5]:
+        pedidos_planificacion[pedido_id], posiciones_ruta[pedido_id] = registro.pedido_pendiente(pedido_id, data)
 
     # DEBUG: Checkbox en el sidebar
     with st.sidebar:
         st.subheader("🔧 Opciones de Depuración")
         debug_mode = st.checkbox("Modo Depuración", value=False)
+        # Se lee al principio de la siguiente ejecución, que es la que se perfila
+        st.checkbox("Perfilar ejecución", key='perfilar', help=f"Guarda un perfil de cada ejecución en '{PERFIL_DIR}'")
 
     # DEBUG: Información de depuración en la página principal
     if debug_mode:
@@ -194,6 +228,11 @@ try:
         st.write("### Datos de los pedidos en planificación")
         df_expanded['OT_ID_Linea'] = df_expanded['OT_ID_Linea'].astype(str)
         df_planificacion = df_expanded[df_expanded['OT_ID_Linea'].isin(pedidos_planificacion.keys())]
+        # Mostrar los procesos IT como columnas
+        df_planificacion = pd.concat(
+            [df_planificacion.drop(columns='it_mask').reset_index(drop=True), decode_it_flags(df_planificacion['it_mask'])],
+            axis=1
+        )
         
         if not df_planificacion.empty:
             st.dataframe(
@@ -214,7 +253,14 @@ try:
             st.write("IDs en df_expanded:", df_expanded['OT_ID_Linea'].unique().tolist())
 
     # Ejecutar planificación
-    plan, makespan, status = planificar_produccion(pedidos_planificacion)
+    # Plan compartido: solo se replanifica si cambian los pedidos (por lotes de líneas idénticas)
+    ventanas_bloqueadas = calendario.ventanas_bloqueadas()
+    plan, makespan, status = coordinador.obtener_plan(
+        pedidos_planificacion, ventanas_bloqueadas=ventanas_bloqueadas, portafolio=PORTAFOLIO_SOLVER
+    )
+    st.caption(f"Plan n.º {coordinador.version} calculado el {coordinador.actualizado:%d/%m/%Y a las %H:%M}")
+
+    from ortools.sat.python import cp_model
 
     if status == cp_model.OPTIMAL:
         st.success("Se encontró una solución óptima para los 5 pedidos más urgentes")
@@ -222,6 +268,11 @@ try:
         st.warning("Se encontró una solución factible pero no óptima para los 5 pedidos más urgentes")
     elif status == cp_model.INFEASIBLE:
         st.error("No se encontró una solución factible para los 5 pedidos más urgentes")
+        analisis = analizar_pedidos(pedidos_planificacion)
+        for pedido, motivo in analisis['pedidos_inviables'].items():
+            st.write(f"- Pedido {pedido}: {motivo}")
+        for proceso, afectados in analisis['procesos_sobrecargados'].items():
+            st.write(f"- {proceso}: la carga de los pedidos {', '.join(afectados)} no cabe antes de sus fechas de entrega")
         st.info("""
         Posibles razones:
         1. Las fechas de entrega son demasiado cercanas
@@ -240,36 +291,39 @@ try:
         st.error(f"Estado desconocido: {status}")
 
     if plan:
-        # Crear DataFrame para visualización
-        df = pd.DataFrame(plan, columns=['Inicio', 'Pedido', 'Orden_Proceso', 'Nombre', 'Duración', 'Operación', 'Subproceso', 'OT', 'Operario'])
+        import plotly.figure_factory as ff
+
+        # DEBUG: Comprobación del plan (rutas, solapamientos, paradas y entregas)
+        if debug_mode:
+            st.subheader("🧪 Validación del Plan")
+            validacion = validar_plan(plan, pedidos_planificacion, ventanas_bloqueadas)
+            if validacion['valido']:
+                st.success(f"El plan es válido ({len(plan)} tareas)")
+            else:
+                st.error(f"El plan tiene {len(validacion['violaciones'])} incidencias")
+                st.dataframe(pd.DataFrame(validacion['violaciones']), hide_index=True, use_container_width=True)
+            st.write("Retraso total (jornadas):", validacion['retraso_total'])
+
+        # Crear DataFrame para visualización, con la posición de cada proceso en la ruta completa
+        df = pd.DataFrame(
+            [(inicio, pedido, posiciones_ruta[str(pedido)][i], *resto) for inicio, pedido, i, *resto in plan],
+            columns=['Inicio', 'Pedido', 'Orden_Proceso', 'Nombre', 'Duración', 'Operación', 'Subproceso', 'OT', 'Operario']
+        )
         
-        # Convertir días a fechas
-        df['Fecha Inicio'] = df['Inicio'].apply(lambda x: fecha_inicio + timedelta(days=x))
-        df['Fecha Fin'] = df.apply(lambda row: row['Fecha Inicio'] + timedelta(days=row['Duración']), axis=1)
+        # Convertir jornadas a fechas
+        df['Fecha Inicio'] = calendario.inicio(df['Inicio'].to_numpy())
+        df['Fecha Fin'] = calendario.fin((df['Inicio'] + df['Duración']).to_numpy())
+        df['Fecha Límite'] = calendario.fin(df['Pedido'].map(lambda x: pedidos[str(x)]['fecha_entrega']).to_numpy())
         
         # Añadir información de secuencia de procesos
         df['Secuencia'] = df.apply(lambda row: f"Paso {row['Orden_Proceso'] + 1} de {len(pedidos[str(row['Pedido'])]['procesos'])}", axis=1)
         
-        # Determinar el estado de cada proceso
-        def determinar_estado(row: pd.Series) -> str:
-            if row['Fecha Fin'] < fecha_actual:
-                return 'Finalizado'
-            elif row['Fecha Inicio'] <= fecha_actual <= row['Fecha Fin']:
-                return 'En Proceso'
-            elif row['Orden_Proceso'] == 0 or all(df[(df['Pedido'] == row['Pedido']) & (df['Orden_Proceso'] < row['Orden_Proceso'])]['Fecha Fin'] <= fecha_actual):
-                return 'Listo para Activar'
-            else:
-                return 'Pendiente'
-
-        def determinar_cumplimiento(row: pd.Series) -> str:
-            fecha_limite = fecha_inicio + timedelta(days=pedidos[str(row['Pedido'])]['fecha_entrega'])
-            if row['Fecha Fin'] > fecha_limite:
-                return 'Fuera de Plazo'
-            else:
-                return 'En Plazo'
-
-        df['Estado'] = df.apply(determinar_estado, axis=1)
-        df['Cumplimiento'] = df.apply(determinar_cumplimiento, axis=1)
+        # Estado real de cada proceso según el registro de avance de planta
+        df['Estado'] = [
+            registro.estado(pedido, proceso, subproceso)
+            for pedido, proceso, subproceso in zip(df['Pedido'], df['Operación'], df['Subproceso'])
+        ]
+        df['Cumplimiento'] = np.where(df['Fecha Fin'] > df['Fecha Límite'], 'Fuera de Plazo', 'En Plazo')
         
         # Reordenar y renombrar columnas para mejor visualización
         columnas_ordenadas = ['Estado', 'Cumplimiento', 'Fecha Inicio', 'Fecha Fin', 'Pedido', 'Nombre', 'Operación', 'Subproceso', 'Secuencia', 'Duración', 'OT', 'Operario']
@@ -374,6 +428,26 @@ try:
                 key='cumplimiento_filtro'
             )
 
+            # Registro de inicios y finales reales de las tareas
+            st.subheader("📝 Registrar Avance")
+            tareas_abiertas = df[df['Estado'].isin(['En Proceso', 'Listo para Activar'])]
+            tareas_por_etiqueta = {
+                f"{pedido} - {proceso} ({subproceso})": (pedido, proceso, subproceso, estado)
+                for pedido, proceso, subproceso, estado in zip(
+                    tareas_abiertas['Pedido'], tareas_abiertas['Proceso'],
+                    tareas_abiertas['Subproceso'], tareas_abiertas['Estado']
+                )
+            }
+            etiqueta = st.selectbox("Tarea", options=list(tareas_por_etiqueta), index=None, placeholder="Seleccionar tarea")
+            tarea = tareas_por_etiqueta.get(etiqueta)
+            col_inicio, col_fin = st.columns(2)
+            if col_inicio.button("▶️ Iniciar", disabled=tarea is None or tarea[3] == 'En Proceso'):
+                registro.registrar_evento(tarea[0], tarea[1], tarea[2], INICIO)
+                st.rerun()
+            if col_fin.button("✅ Finalizar", disabled=tarea is None):
+                registro.registrar_evento(tarea[0], tarea[1], tarea[2], FIN)
+                st.rerun()
+
         # Crear DataFrame para Gantt
         df_gantt = pd.DataFrame({
             'Task': [f"{row['Pedido']} - {row['Proceso']}" for _, row in df_filtrado.iterrows()],
@@ -480,7 +554,7 @@ try:
         # Métricas principales
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Fecha de Finalización", (fecha_inicio + timedelta(days=makespan)).strftime("%d/%m/%Y"))
+            st.metric("Fecha de Finalización", calendario.fecha_fin(makespan).strftime("%d/%m/%Y"))
         with col2:
             st.metric("Número de Pedidos", len(df_filtrado['Pedido'].unique()))
         with col3:
@@ -504,7 +578,7 @@ try:
             }
             
             # Obtener la fecha límite del pedido
-            fecha_limite = fecha_inicio + timedelta(days=pedidos[str(row['Pedido'])]['fecha_entrega'])
+            fecha_limite = calendario.fecha_fin(pedidos[str(row['Pedido'])]['fecha_entrega'])
             
             st.markdown(f"""
             **Pedido {row['Pedido']} - {row['Proceso']}** {estado_emoji[row['Cumplimiento']]}
@@ -519,17 +593,23 @@ try:
             - Cumplimiento: {row['Cumplimiento']}
             """)
 
-        # Calcular fechas límite internas para todos los pedidos
-        fechas_limite_internas = {
-            pedido: calcular_fechas_limite_internas(pedido, data, fecha_inicio) 
-            for pedido, data in pedidos.items()
-        }
+        # Prioridad y fechas límite internas de una vez, solo para los pedidos del plan
+        # (las fechas límite se calculan en jornadas y se convierten con el calendario)
+        ids_plan = df['Pedido'].astype(str).unique()
+        lote = preparar_lote(pedidos, ids_plan)
+        prioridades = calcular_prioridades_lote(lote['fechas_entrega'], lote['n_procesos'], lote['pendientes'])
+        limites = calcular_fechas_limite_lote(lote['fechas_entrega'], lote['n_procesos'], lote['duraciones'])
+
+        codigos = pd.Index(ids_plan).get_indexer(df['Pedido'].astype(str))
+        orden_proceso = df['Secuencia'].str.split().str[1].astype(int).to_numpy() - 1
+        limites_tarea = limites[lote['inicios'][codigos] + orden_proceso]
 
         # Añadir prioridad y fechas límite internas al DataFrame
-        df['Prioridad'] = df['Pedido'].apply(lambda x: calcular_prioridad(x, pedidos[str(x)]))
-        df['Fecha Límite Interna'] = df.apply(
-            lambda row: fechas_limite_internas[str(row['Pedido'])][int(row['Secuencia'].split()[1]) - 1], 
-            axis=1
+        df['Prioridad'] = prioridades[codigos]
+        df['Fecha Límite Interna'] = np.where(
+            np.isnan(limites_tarea),
+            np.datetime64('NaT'),
+            calendario.fin(np.nan_to_num(limites_tarea).astype(np.int64))
         )
 
         # Reordenar columnas para mejor visualización
@@ -553,6 +633,44 @@ try:
         # Añadir gráfico de prioridades
         st.subheader("Distribución de Prioridades")
         st.bar_chart(df.groupby('Pedido')['Prioridad'].mean().sort_values(ascending=False))
+
+        # Capacidad y cuellos de botella sobre el plan completo
+        st.subheader("Capacidad y Cuellos de Botella")
+        agrupacion = st.radio("Agrupar por", ["Proceso", "Proceso y subproceso"], horizontal=True)
+        capacidad = analizar_capacidad(plan, por_subproceso=agrupacion == "Proceso y subproceso")
+        jornadas = calendario.inicio(np.arange(capacidad['ocupacion'].shape[1]))
+
+        import plotly.graph_objects as go
+
+        col1, col2 = st.columns(2)
+        for columna, clave, titulo, escala in [
+            (col1, 'ocupacion', "Ocupación por jornada", 'Blues'),
+            (col2, 'cola', "Tareas en espera por jornada", 'Reds')
+        ]:
+            with columna:
+                st.markdown(f"#### {titulo}")
+                fig_capacidad = go.Figure(go.Heatmap(
+                    z=capacidad[clave],
+                    x=jornadas,
+                    y=capacidad['recursos'],
+                    colorscale=escala
+                ))
+                fig_capacidad.update_layout(height=400, margin=dict(l=150, r=20, t=20, b=40))
+                st.plotly_chart(fig_capacidad, use_container_width=True)
+
+        st.dataframe(
+            pd.DataFrame(capacidad['resumen']),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "recurso": st.column_config.TextColumn("Recurso"),
+                "tareas": st.column_config.NumberColumn("Tareas"),
+                "utilizacion_media": st.column_config.ProgressColumn("Utilización media", min_value=0, max_value=1, format="%.2f"),
+                "cola_media": st.column_config.NumberColumn("Cola media", format="%.2f"),
+                "cola_maxima": st.column_config.NumberColumn("Cola máxima"),
+                "jornadas_ociosas": st.column_config.NumberColumn("Jornadas ociosas")
+            }
+        )
     else:
         st.error("No se pudo encontrar una solución óptima para los pedidos actuales")
 
@@ -565,4 +683,9 @@ except Exception as e:
     3. La cuenta de servicio tiene los permisos necesarios en BigQuery
     4. El dataset y la tabla especificados existen y son accesibles
     """)
-    st.stop() 
\ No newline at end of file
+    st.stop()
+
+finally:
+    # También al detener o relanzar el script (st.stop, st.rerun)
+    if perfil is not None:
+        guardar_perfil(perfil, PERFIL_DIR)
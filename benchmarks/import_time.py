@@ -0,0 +1,183 @@
+"""
+Mide el tiempo de importación en frío de los módulos de la aplicación y el
+tiempo de la primera ejecución y de una recarga de `app.py`.
+
+Cada medición se ejecuta en un intérprete nuevo para que no influya la
+caché de módulos. `app.py` se ejecuta con `streamlit.testing.v1.AppTest` y
+pedidos sintéticos en lugar de BigQuery. Termina con error si algún módulo
+del núcleo arrastra Streamlit, OR-Tools, Plotly o las librerías de la nube.
+
+Uso:
+    python benchmarks/import_time.py [--repeticiones 5] [--sin-app]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos propios que deben poder importarse sin dependencias pesadas
+MODULOS_NUCLEO = [
+    'utils',
+    'ortools_sergar',
+    'presolve',
+    'agrupacion_lotes',
+    'configuracion_solver',
+    'coordinador',
+    'calendario',
+    'analitica',
+    'progreso',
+    'validacion',
+    'processing.transformations',
+    'processing.articles',
+    'bigquery.reader',
+    'bigquery.uploader',
+]
+
+# Dependencias pesadas, como referencia de lo que se ahorra al diferirlas
+MODULOS_PESADOS = [
+    'streamlit',
+    'plotly.figure_factory',
+    'ortools.sat.python.cp_model',
+    'google.cloud.bigquery',
+]
+
+SCRIPT = """
+import sys, time
+inicio = time.perf_counter()
+import {modulo}
+duracion = time.perf_counter() - inicio
+pesados = [m for m in {pesados!r} if m in sys.modules]
+print(duracion, ','.join(pesados))
+"""
+
+# Ejecuta app.py dos veces (primera ejecución y recarga) con pedidos sintéticos
+SCRIPT_APP = """
+import os, sys, time, types
+os.environ.setdefault('SERGAR_PROGRESO_DB', ':memory:')
+import pandas as pd
+from datetime import date, timedelta
+from processing.articles import IT_COLUMNS
+
+def articulos(*args, **kwargs):
+    filas = []
+    for n in range({pedidos}):
+        fila = {{'numero_pedido': 1000 + n, 'nombre': f'Artículo {{n % 5}}', 'OT_ID_Linea': 10000 + n,
+                 'familia': 'F', 'cantidad': 10, 'importe': 1.0,
+                 'fecha_entrega': date(2024, 1, 1) + timedelta(days=20 + 3 * n)}}
+        fila.update({{columna: 'X' if (n + i) % 4 == 0 else None for i, columna in enumerate(IT_COLUMNS)}})
+        fila['IT01_Dibujo'] = 'X'
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+import bigquery.reader
+bigquery.reader.read_articles = articulos
+bigquery.reader.read_articles_arrow = articulos
+# Cliente de lectura falso para no necesitar credenciales
+stub = types.ModuleType('google.cloud.bigquery_storage')
+stub.BigQueryReadClient = type('BigQueryReadClient', (), {{'from_service_account_json': staticmethod(lambda ruta: object())}})
+sys.modules['google.cloud.bigquery_storage'] = stub
+
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('app.py', default_timeout=300)
+tiempos = []
+for _ in range(2):
+    inicio = time.perf_counter()
+    app.run()
+    tiempos.append(time.perf_counter() - inicio)
+if app.exception:
+    sys.exit(app.exception[0].value)
+print(*tiempos)
+"""
+
+
+def medir_importacion(modulo: str, repeticiones: int) -> tuple[float, list[str]]:
+    """
+    Importa un módulo en intérpretes nuevos y devuelve la mediana en segundos.
+
+    Args:
+        modulo (str): Nombre del módulo a importar
+        repeticiones (int): Número de intérpretes a lanzar
+
+    Returns:
+        tuple[float, list[str]]: (mediana, módulos pesados cargados por la importación)
+    """
+    tiempos = []
+    pesados = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(modulo=modulo, pesados=MODULOS_PESADOS)],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.split()
+        tiempos.append(float(salida[0]))
+        pesados = salida[1].split(',') if len(salida) > 1 else []
+    return statistics.median(tiempos), pesados
+
+
+def medir_app(repeticiones: int, pedidos: int = 20) -> tuple[float, float]:
+    """
+    Ejecuta `app.py` en intérpretes nuevos y devuelve las medianas en segundos.
+
+    Args:
+        repeticiones (int): Número de intérpretes a lanzar
+        pedidos (int): Pedidos sintéticos que devuelve la lectura de BigQuery
+
+    Returns:
+        tuple[float, float]: (primera ejecución, recarga)
+    """
+    primeras = []
+    recargas = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', SCRIPT_APP.format(pedidos=pedidos)],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.split()
+        primeras.append(float(salida[-2]))
+        recargas.append(float(salida[-1]))
+    return statistics.median(primeras), statistics.median(recargas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--sin-app', action='store_true', help="No medir la ejecución de app.py")
+    args = parser.parse_args()
+
+    errores = []
+    print(f"{'Módulo':<32} {'Mediana (ms)':>12}  Dependencias pesadas cargadas")
+    for modulo in MODULOS_NUCLEO + MODULOS_PESADOS:
+        try:
+            mediana, pesados = medir_importacion(modulo, args.repeticiones)
+        except subprocess.CalledProcessError as e:
+            print(f"{modulo:<32} {'error':>12}  {e.stderr.strip().splitlines()[-1]}")
+            errores.append(f"{modulo} no se puede importar")
+            continue
+        cargados = [p for p in pesados if p != modulo]
+        print(f"{modulo:<32} {mediana * 1000:>12.1f}  {', '.join(cargados) or '-'}")
+        if modulo in MODULOS_NUCLEO and cargados:
+            errores.append(f"{modulo} carga {', '.join(cargados)}")
+
+    if not args.sin_app:
+        try:
+            primera, recarga = medir_app(args.repeticiones)
+            print(f"{'app.py (primera ejecución)':<32} {primera * 1000:>12.1f}")
+            print(f"{'app.py (recarga)':<32} {recarga * 1000:>12.1f}")
+        except subprocess.CalledProcessError as e:
+            print(f"{'app.py':<32} {'error':>12}  {e.stderr.strip().splitlines()[-1]}")
+            errores.append("app.py falla al ejecutarse")
+
+    if errores:
+        print("\n".join(["", "Fallos:"] + errores))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+def read_articles(client, table_id: str) -> pd.DataFrame:
+    """
+    Reads the orders table and expands it to one row per article.
+
+    Args:
+        client (bigquery.Client): The BigQuery client.
+        table_id (str): Fully qualified id of the orders table.
+
+    Returns:
+        pd.DataFrame: One row per article with its order's `numero_pedido` and `fecha_entrega`.
+    """
+    query_job = client.query(f'SELECT * FROM `{table_id}`')
+    df = query_job.result().to_dataframe()
+
+    # Expand the articulos field
+    df = df.explode('articulos')
+
+    # Convert articulos from string to dict if needed
+    if isinstance(df['articulos'].iloc[0], str):
+        df['articulos'] = df['articulos'].apply(json.loads)
+
+    df_expanded = pd.json_normalize(df['articulos'])
+
+    # Add the order number and delivery date from the original DataFrame
+    df_expanded['numero_pedido'] = df['numero_pedido'].values
+    df_expanded['fecha_entrega'] = df['fecha_entrega'].values
+
+    # Columns of the expanded DataFrame:
+    #    Index(['nombre', 'OT_ID_Linea', 'familia', 'cantidad', 'importe',
+    #        'IT01_Dibujo', 'IT02_Pantalla', 'IT03_Corte', 'IT05_Grabado',
+    #        'IT06_Adhesivo', 'IT06_Laminado', 'IT07_Taladro', 'IT07_Can_romo',
+    #        'IT07_Numerado', 'IT08_Embalaje', 'IT04_Impresion._',
+    #        'IT04_Impresion.digital', 'IT04_Impresion.serigrafia',
+    #        'IT07_Mecanizado._', 'IT07_Mecanizado.plotter',
+    #        'IT07_Mecanizado.fresado', 'IT07_Mecanizado.laser',
+    #        'IT07_Mecanizado.semicorte', 'IT07_Mecanizado.plegado',
+    #        'IT07_Mecanizado.burbuja_teclas', 'IT07_Mecanizado.hendido',
+    #        'IT07_Mecanizado.cepillado'],
+    #    dtype='object')
+
+    return df_expanded
+
+
+def _flatten_articles(table) -> pd.DataFrame:
+    """
+    Expands an Arrow table of orders to one row per article using compute kernels.
+
+    Nested struct fields are flattened with the same dotted names that
+    `pd.json_normalize` produces (e.g. 'IT04_Impresion.digital').
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    column = table.column('articulos')
+    if not pa.types.is_struct(column.type.value_type):
+        # Articles stored as JSON strings: fall back to the row-wise path
+        df = table.to_pandas().explode('articulos')
+        df['articulos'] = df['articulos'].apply(lambda x: json.loads(x) if isinstance(x, str) else x)
+        df = df[df['articulos'].notna()]
+        df_expanded = pd.json_normalize(df['articulos'].tolist())
+        df_expanded['numero_pedido'] = df['numero_pedido'].values
+        df_expanded['fecha_entrega'] = df['fecha_entrega'].values
+        return df_expanded
+
+    articulos = pa.concat_arrays(column.chunks) if column.num_chunks else pa.array([], column.type)
+    parents = pc.list_parent_indices(articulos)
+    flat = pa.Table.from_arrays([pc.list_flatten(articulos)], names=['articulos'])
+    while any(pa.types.is_struct(field.type) for field in flat.schema):
+        flat = flat.flatten()
+
+    flat = flat.rename_columns([name[len('articulos.'):] for name in flat.column_names])
+    flat = flat.append_column('numero_pedido', pc.take(table.column('numero_pedido'), parents))
+    flat = flat.append_column('fecha_entrega', pc.take(table.column('fecha_entrega'), parents))
+
+    return flat.to_pandas()
+
+
+def read_articles_arrow(read_client, table_id: str, billing_project: str = None, max_streams: int = 4) -> pd.DataFrame:
+    """
+    Reads the orders table through the BigQuery Storage Read API as Arrow record batches.
+
+    The table is split into up to `max_streams` streams that are read and
+    flattened in parallel, so no Python object is built per order before the
+    final DataFrame.
+
+    Args:
+        read_client (bigquery_storage.BigQueryReadClient): The Storage Read API client.
+        table_id (str): Fully qualified id of the orders table.
+        billing_project (str): Project billed for the read session, defaults to the table's.
+        max_streams (int): Maximum number of parallel streams.
+
+    Returns:
+        pd.DataFrame: One row per article with its order's `numero_pedido` and
+            `fecha_entrega`, same columns as `read_articles`.
+    """
+    from google.cloud.bigquery_storage import types
+
+    project_id, dataset_id, table_name = table_id.split('.')
+    read_session = read_client.create_read_session(
+        parent=f"projects/{billing_project or project_id}",
+        read_session=types.ReadSession(
+            table=f"projects/{project_id}/datasets/{dataset_id}/tables/{table_name}",
+            data_format=types.DataFormat.ARROW,
+            read_options=types.ReadSession.TableReadOptions(selected_fields=['numero_pedido', 'fecha_entrega', 'articulos'])
+        ),
+        max_stream_count=max_streams
+    )
+
+    def read_stream(stream):
+        return _flatten_articles(read_client.read_rows(stream.name).to_arrow(read_session))
+
+    if not read_session.streams:
+        return pd.DataFrame(columns=['fecha_entrega'])
+
+    with ThreadPoolExecutor(max_workers=len(read_session.streams)) as executor:
+        frames = list(executor.map(read_stream, read_session.streams))
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+
+
+class JsonLinesSink:
+    """
+    Writes orders to a local newline-delimited JSON file.
+
+    Same format BigQuery receives from `load_sales_orders`, useful to inspect
+    a batch import offline before loading it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, orders: list):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(order, ensure_ascii=False) + '\n' for order in orders)
+
+    def __repr__(self):
+        return f"JsonLinesSink({self.path!r})"
+
+
+class SQLiteSink:
+    """
+    Writes orders to a local SQLite database, one row per order.
+
+    Articles are stored as a JSON document so the nested IT structure is kept
+    as-is. Orders already present are replaced by `numero_pedido`.
+    """
+
+    def __init__(self, path: str, table_name: str = 'sales_orders'):
+        self.path = path
+        self.table_name = table_name
+
+    def write(self, orders: list):
+        rows = [
+            (
+                order['numero_pedido'],
+                order['cliente'],
+                order['fecha_pedido'],
+                order['fecha_entrega'],
+                json.dumps(order['articulos'], ensure_ascii=False)
+            )
+            for order in orders
+        ]
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table_name} (
+                    numero_pedido INTEGER PRIMARY KEY,
+                    cliente TEXT,
+                    fecha_pedido TEXT,
+                    fecha_entrega TEXT,
+                    articulos TEXT
+                )
+                """
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table_name} VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def __repr__(self):
+        return f"SQLiteSink({self.path!r})"
+
+
+class BigQuerySink:
+    """
+    Loads orders into the BigQuery orders table with a single load job.
+
+    The load truncates the destination table, so the orders written must be
+    the complete, merged set.
+    """
+
+    def __init__(self, credentials_path: str, table_id: str):
+        self.credentials_path = credentials_path
+        self.table_id = table_id
+
+    def write(self, orders: list):
+        # Import on first use so local sinks work without the cloud libraries
+        from bigquery.uploader import load_sales_orders_parquet
+
+        load_sales_orders_parquet(orders, self.credentials_path, self.table_id)
+
+    def __repr__(self):
+        return f"BigQuerySink({self.table_id!r})"
+
+
+def sink_from_uri(uri: str, credentials_path: str = None):
+    """
+    Builds a sink from a destination URI.
+
+    Args:
+        uri (str): 'bq://project.dataset.table', 'sqlite:///path/to/file.db'
+            or a path ending in '.jsonl' / '.ndjson'.
+        credentials_path (str): Credentials file for the BigQuery client.
+
+    Returns:
+        A sink object exposing `write(orders)`.
+    """
+    if uri.startswith('bq://'):
+        return BigQuerySink(credentials_path, uri[len('bq://'):])
+    if uri.startswith('sqlite:///'):
+        return SQLiteSink(uri[len('sqlite:///'):])
+    if uri.endswith(('.jsonl', '.ndjson')):
+        return JsonLinesSink(uri)
+
+    raise ValueError(f"Unsupported sink: {uri}")
@@ -1,9 +1,149 @@
-from google.cloud import bigquery
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, date
+from functools import lru_cache
+import io
 import re
 
+# Columns of the ERP Excel export, as read by `pd.read_excel`
+SALES_ORDERS_COLUMNS = [
+    'Nº de pedido', 'Cliente', 'Fecha Pedido', 'Fecha Entrega', 'Articulo', 'ID Línea',
+    'Familia', 'Unnamed: 6', 'Cantidad', 'Importe',
+    'IT01 Dibujo', 'IT02 Pantalla', 'IT03 Corte',
+    'IT04 Impresión', 'IT04 Impresión Digital', 'IT04 Impresión Serigrafia',
+    'IT05 Grabado', 'IT06 Adhesivo', 'IT06 Laminado',
+    'IT07 Mecanizado', 'IT07 Mecanizado Plotter', 'IT07 Mecanizado Fresado',
+    'IT07 Mecanizado Troquelado', 'IT07 Mecanizado Laser', 'IT07 Mecanizado Semicorte',
+    'IT07 Mecanizado Plegado', 'IT07 Mecanizado Burbuja Teclas', 'IT07 Mecanizado Hendido',
+    'IT07 Mecanizado Cepillado', 'IT07 Taladro', 'IT07 Can. Romo', 'IT07 Numerado',
+    'IT08 Embalaje', 'Servido'
+]
+
+# Subprocess fields of the nested IT structs built by `process_data`
+IT04_FIELDS = ['_', 'digital', 'serigrafia']
+IT07_MECANIZADO_FIELDS = [
+    '_', 'plotter', 'fresado', 'troquelado', 'laser', 'semicorte',
+    'plegado', 'burbuja_teclas', 'hendido', 'cepillado'
+]
+IT_FLAG_FIELDS = [
+    'IT01_Dibujo', 'IT02_Pantalla', 'IT03_Corte', 'IT05_Grabado', 'IT06_Adhesivo',
+    'IT06_Laminado', 'IT07_Taladro', 'IT07_Can_romo', 'IT07_Numerado', 'IT08_Embalaje'
+]
+
+
+@lru_cache(maxsize=None)
+def _clean_column_name(name: str) -> str:
+    return (re.sub(r'[^\w\s]', '', name)
+            .strip()
+            .replace(" ", "_")
+            .replace(".", "")
+            .replace("º", ""))
+
+
+# Precomputed BigQuery-safe names for the known export columns
+COLUMN_NAME_MAP = {column: _clean_column_name(column) for column in SALES_ORDERS_COLUMNS}
+
+
+def clean_column_names(columns) -> dict:
+    """
+    Maps Excel column names to BigQuery-safe names.
+
+    Known export columns come from `COLUMN_NAME_MAP`; any other column is
+    cleaned once and cached.
+    """
+    return {column: COLUMN_NAME_MAP.get(column) or _clean_column_name(column) for column in columns}
+
+
+def _orders_arrow_schema():
+    import pyarrow as pa
+
+    flag = pa.string()
+    article = pa.struct(
+        [
+            ('nombre', pa.string()),
+            ('OT_ID_Linea', pa.int64()),
+            ('familia', pa.string()),
+            ('cantidad', pa.int64()),
+            ('importe', pa.float64()),
+        ]
+        + [(field, flag) for field in IT_FLAG_FIELDS]
+        + [
+            ('IT04_Impresion', pa.struct([(field, flag) for field in IT04_FIELDS])),
+            ('IT07_Mecanizado', pa.struct([(field, flag) for field in IT07_MECANIZADO_FIELDS])),
+            ('servido', pa.string()),
+        ]
+    )
+
+    return pa.schema([
+        ('numero_pedido', pa.int64()),
+        ('cliente', pa.string()),
+        ('fecha_pedido', pa.date32()),
+        ('fecha_entrega', pa.date32()),
+        ('articulos', pa.list_(article)),
+    ])
+
+
+def _as_string(value):
+    return None if value is None else str(value)
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _prepare_article(article: dict) -> dict:
+    row = {
+        'nombre': _as_string(article.get('nombre')),
+        'OT_ID_Linea': article.get('OT_ID_Linea'),
+        'familia': _as_string(article.get('familia')),
+        'cantidad': article.get('cantidad'),
+        'importe': article.get('importe'),
+        'servido': _as_string(article.get('servido')),
+    }
+    for field in IT_FLAG_FIELDS:
+        row[field] = _as_string(article.get(field))
+
+    impresion = article.get('IT04_Impresion') or {}
+    row['IT04_Impresion'] = {field: _as_string(impresion.get(field)) for field in IT04_FIELDS}
+    mecanizado = article.get('IT07_Mecanizado') or {}
+    row['IT07_Mecanizado'] = {field: _as_string(mecanizado.get(field)) for field in IT07_MECANIZADO_FIELDS}
+
+    return row
+
+
+def write_orders_parquet(orders: list, destination, compression: str = 'zstd'):
+    """
+    Writes orders, including the nested articles and IT structs, to a Parquet file.
+
+    Args:
+        orders (list): Orders as returned by `process_data`.
+        destination: Path or writable binary file object.
+        compression (str): Parquet compression codec.
+
+    Returns:
+        None
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = [
+        {
+            'numero_pedido': order['numero_pedido'],
+            'cliente': _as_string(order['cliente']),
+            'fecha_pedido': _as_date(order['fecha_pedido']),
+            'fecha_entrega': _as_date(order['fecha_entrega']),
+            'articulos': [_prepare_article(article) for article in order['articulos']],
+        }
+        for order in orders
+    ]
+
+    table = pa.Table.from_pylist(rows, schema=_orders_arrow_schema())
+    pq.write_table(table, destination, compression=compression)
+
+
 def load_sales_orders(orders: list, credentials_path: str, table_id: str):
+    from google.cloud import bigquery
 
     # Create client
     client = bigquery.Client.from_service_account_json(credentials_path)
@@ -23,6 +163,48 @@ def load_sales_orders(orders: list, credentials_path: str, table_id: str):
 
     job.result()
 
+def load_sales_orders_parquet(orders: list, credentials_path: str, table_id: str, client=None):
+    """
+    Loads the orders into BigQuery as a single compressed Parquet file.
+
+    Same result as `load_sales_orders`, but the payload is columnar and
+    compressed and its schema is explicit instead of inferred from JSON.
+
+    Args:
+        orders (list): Orders as returned by `process_data`.
+        credentials_path (str): The path to the credentials file for the BigQuery client.
+        table_id (str): Fully qualified id of the destination table.
+        client: Optional BigQuery client (or a fake one in tests).
+
+    Returns:
+        None
+    """
+    from google.cloud import bigquery
+
+    if client is None:
+        client = bigquery.Client.from_service_account_json(credentials_path)
+
+    buffer = io.BytesIO()
+    write_orders_parquet(orders, buffer)
+
+    parquet_options = bigquery.format_options.ParquetOptions()
+    parquet_options.enable_list_inference = True
+
+    job_config = bigquery.LoadJobConfig(
+        write_disposition="WRITE_TRUNCATE",
+        source_format=bigquery.SourceFormat.PARQUET
+        )
+    job_config.parquet_options = parquet_options
+
+    job = client.load_table_from_file(
+        buffer,
+        destination = table_id,
+        job_config = job_config,
+        rewind = True
+    )
+
+    job.result()
+
 def load_sales_orders_table(df: pd.DataFrame, credentials_path: str, project_id: str, dataset_id: str, table_name: str):
     """
     Loads a sales orders table into BigQuery.
@@ -38,14 +220,11 @@ def load_sales_orders_table(df: pd.DataFrame, credentials_path: str, project_id:
         None
     """
 
+    from google.cloud import bigquery
+
     try:
         # Rename columns
-        df_renamed_columns = df.rename(columns=lambda x:
-                       re.sub(r'[^\w\s]', '', x)
-                   .strip()
-                   .replace(" ", "_")
-                   .replace(".", "")
-                   .replace("º", ""))
+        df_renamed_columns = df.rename(columns=clean_column_names(df.columns))
     
         # Create client
         client = bigquery.Client.from_service_account_json(credentials_path)
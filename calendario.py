@@ -0,0 +1,200 @@
+import json
+import threading
+from datetime import datetime, date
+
+import numpy as np
+
+# Turnos por defecto (hora de inicio, hora de fin)
+TURNOS_POR_DEFECTO = [(7, 15)]
+
+# Días laborables por defecto (0 = lunes ... 6 = domingo)
+DIAS_LABORABLES_POR_DEFECTO = [0, 1, 2, 3, 4]
+
+# Días naturales que cubre el índice inicialmente; se amplía si hace falta
+HORIZONTE_INICIAL_DIAS = 3 * 365
+
+# Días naturales a partir de los cuales no se amplía más el índice
+HORIZONTE_MAXIMO_DIAS = 100 * 365
+
+
+class CalendarioLaboral:
+    """
+    Calendario de jornadas laborables para convertir los tiempos del planificador.
+
+    El planificador trabaja en jornadas: el desplazamiento `n` es la n-ésima
+    jornada laborable a partir de `fecha_inicio`, sin fines de semana ni
+    festivos. El calendario precalcula el inicio y fin de cada jornada para
+    convertir desplazamientos en fechas con una única indexación de NumPy.
+
+    Cada jornada laborable es una unidad de capacidad por proceso, tenga los
+    turnos que tenga: los turnos solo fijan la hora de apertura y de cierre con
+    que se muestran las fechas de inicio y fin.
+
+    El calendario se comparte entre sesiones; el índice se amplía construyendo
+    los arrays nuevos y sustituyéndolos todos a la vez.
+    """
+
+    def __init__(self, fecha_inicio: datetime, turnos: list = None, dias_laborables: list = None,
+                 festivos: list = None, paradas: dict = None):
+        """
+        Args:
+            fecha_inicio (datetime): Fecha base del desplazamiento 0
+            turnos (list): Lista de (hora_inicio, hora_fin) de cada turno del día; la
+                apertura del primero y el cierre del último son las horas de cada jornada
+            dias_laborables (list): Días de la semana laborables (0 = lunes)
+            festivos (list): Fechas no laborables
+            paradas (dict): Periodos sin capacidad por proceso, {proceso: [(desde, hasta), ...]}
+                con fechas inclusivas
+        """
+        self.fecha_inicio = np.datetime64(_a_fecha(fecha_inicio), 'D')
+        self.turnos = [tuple(turno) for turno in (turnos or TURNOS_POR_DEFECTO)]
+        self.dias_laborables = list(dias_laborables if dias_laborables is not None else DIAS_LABORABLES_POR_DEFECTO)
+        self.festivos = np.array([_a_fecha(f) for f in (festivos or [])], dtype='datetime64[D]')
+        self.paradas = paradas or {}
+
+        self._weekmask = [dia in self.dias_laborables for dia in range(7)]
+        if not any(self._weekmask):
+            raise ValueError("El calendario necesita al menos un día laborable a la semana")
+        self._apertura = np.timedelta64(int(min(t[0] for t in self.turnos) * 60), 'm')
+        self._cierre = np.timedelta64(int(max(t[1] for t in self.turnos) * 60), 'm')
+
+        self._lock = threading.Lock()
+        # (jornadas, inicio_jornada, fin_jornada, horizonte_dias), siempre coherentes entre sí
+        self._indice = self._construir_indice(HORIZONTE_INICIAL_DIAS)
+
+    @classmethod
+    def desde_json(cls, ruta: str, fecha_inicio: datetime) -> 'CalendarioLaboral':
+        """
+        Crea el calendario a partir de un archivo JSON con las claves opcionales
+        'turnos', 'dias_laborables', 'festivos' y 'paradas'.
+        """
+        with open(ruta, encoding='utf-8') as f:
+            config = json.load(f)
+
+        return cls(
+            fecha_inicio,
+            turnos=config.get('turnos'),
+            dias_laborables=config.get('dias_laborables'),
+            festivos=config.get('festivos'),
+            paradas=config.get('paradas')
+        )
+
+    @property
+    def jornadas(self) -> np.ndarray:
+        return self._indice[0]
+
+    @property
+    def inicio_jornada(self) -> np.ndarray:
+        return self._indice[1]
+
+    @property
+    def fin_jornada(self) -> np.ndarray:
+        return self._indice[2]
+
+    def _construir_indice(self, horizonte_dias: int) -> tuple:
+        dias = np.arange(self.fecha_inicio, self.fecha_inicio + horizonte_dias, dtype='datetime64[D]')
+        jornadas = dias[np.is_busday(dias, weekmask=self._weekmask, holidays=self.festivos)]
+        inicio_jornada = (jornadas + self._apertura).astype('datetime64[s]')
+        fin_jornada = (jornadas + self._cierre).astype('datetime64[s]')
+        return jornadas, inicio_jornada, fin_jornada, horizonte_dias
+
+    def _ampliar(self, cubierto) -> tuple:
+        """
+        Devuelve un índice que cumple `cubierto(indice)`, ampliándolo si hace falta.
+
+        Los lectores usan el índice devuelto y no `self._indice`, que otra
+        sesión puede sustituir mientras tanto; el índice nunca se reduce.
+
+        Raises:
+            ValueError: Si ni con `HORIZONTE_MAXIMO_DIAS` se cumple `cubierto`
+        """
+        indice = self._indice
+        if cubierto(indice):
+            return indice
+        with self._lock:
+            indice = self._indice
+            horizonte = indice[3]
+            while not cubierto(indice):
+                if horizonte >= HORIZONTE_MAXIMO_DIAS:
+                    raise ValueError(f"Fuera del horizonte máximo del calendario ({HORIZONTE_MAXIMO_DIAS} días)")
+                horizonte = min(horizonte * 2, HORIZONTE_MAXIMO_DIAS)
+                indice = self._construir_indice(horizonte)
+            self._indice = indice
+            return indice
+
+    def _asegurar_jornadas(self, n: int) -> tuple:
+        """Índice con al menos `n` jornadas."""
+        return self._ampliar(lambda indice: len(indice[0]) >= n)
+
+    def _asegurar_fecha(self, fecha: np.datetime64) -> tuple:
+        """Índice que cubre `fecha`."""
+        return self._ampliar(lambda indice: self.fecha_inicio + indice[3] > fecha)
+
+    def desplazamiento(self, fechas) -> np.ndarray:
+        """
+        Convierte fechas en desplazamientos de jornada.
+
+        El resultado es el número de jornadas laborables anteriores a cada
+        fecha, es decir, el desplazamiento exclusivo que el planificador usa
+        como fecha de entrega. Las fechas anteriores al inicio dan 0.
+
+        Args:
+            fechas: Fechas o array de fechas
+
+        Returns:
+            np.ndarray: Desplazamientos enteros
+
+        Raises:
+            ValueError: Si alguna fecha está vacía (NaT)
+        """
+        fechas = np.asarray(fechas, dtype='datetime64[D]')
+        if np.isnat(fechas).any():
+            raise ValueError("Hay fechas vacías que no se pueden convertir en jornadas")
+        jornadas = self._asegurar_fecha(fechas.max())[0] if fechas.size else self.jornadas
+        return np.searchsorted(jornadas, fechas, side='left')
+
+    def inicio(self, desplazamientos) -> np.ndarray:
+        """Fecha y hora de inicio de la jornada de cada desplazamiento."""
+        desplazamientos = np.asarray(desplazamientos, dtype=np.int64)
+        n = int(desplazamientos.max()) + 1 if desplazamientos.size else 0
+        return self._asegurar_jornadas(n)[1][desplazamientos]
+
+    def fin(self, desplazamientos) -> np.ndarray:
+        """
+        Fecha y hora de fin para desplazamientos exclusivos.
+
+        Una tarea que termina en el desplazamiento `n` acaba al cierre de la
+        jornada `n - 1`; el desplazamiento 0 corresponde al inicio del calendario.
+        """
+        desplazamientos = np.asarray(desplazamientos, dtype=np.int64)
+        n = int(desplazamientos.max()) if desplazamientos.size else 0
+        _, inicio_jornada, fin_jornada, _ = self._asegurar_jornadas(n)
+        anteriores = np.maximum(desplazamientos - 1, 0)
+        return np.where(desplazamientos > 0, fin_jornada[anteriores], inicio_jornada[0])
+
+    def fecha_fin(self, desplazamiento: int) -> datetime:
+        """Versión escalar de `fin` que devuelve un datetime."""
+        return self.fin(np.array([desplazamiento]))[0].astype(datetime)
+
+    def ventanas_bloqueadas(self) -> dict:
+        """
+        Convierte las paradas de cada proceso en ventanas de jornadas sin capacidad.
+
+        Returns:
+            dict: {proceso: [(inicio, fin), ...]} con desplazamientos, fin exclusivo
+        """
+        ventanas = {}
+        for proceso, periodos in self.paradas.items():
+            for desde, hasta in periodos:
+                inicio, fin = self.desplazamiento([_a_fecha(desde), np.datetime64(_a_fecha(hasta), 'D') + 1])
+                if fin > inicio:
+                    ventanas.setdefault(proceso, []).append((int(inicio), int(fin)))
+        return ventanas
+
+
+def _a_fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor)
+    return valor
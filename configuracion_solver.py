@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+
+from utils import SECUENCIA_PROCESOS, duracion_en_jornadas
+
+PRESETS_PATH = os.getenv(
+    'SERGAR_PRESETS_SOLVER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'presets_solver.json')
+)
+
+# Estrategia de búsqueda -> valor de `search_branching` de CP-SAT. El modelo
+# declara siempre "empezar antes la tarea con menor inicio posible"; la
+# estrategia decide si el solver la sigue, la ignora o la combina con otras
+ESTRATEGIAS = {
+    'automatica': 'AUTOMATIC_SEARCH',
+    'inicio_temprano': 'FIXED_SEARCH',
+    'portafolio': 'PORTFOLIO_SEARCH'
+}
+
+# Variantes que compiten en el modo portafolio, sobre los parámetros del tamaño
+PORTAFOLIO = [
+    {'estrategia': 'automatica', 'linearization_level': 1},
+    {'estrategia': 'inicio_temprano', 'linearization_level': 0},
+    {'estrategia': 'portafolio', 'linearization_level': 2}
+]
+
+
+def _presets_por_defecto() -> list:
+    """Presets usados mientras no haya un archivo generado con `--afinar`."""
+    nucleos = os.cpu_count() or 1
+    return [
+        {'max_tareas': 100, 'parametros': {
+            'num_search_workers': min(nucleos, 4), 'max_time_in_seconds': 10.0,
+            'linearization_level': 1, 'estrategia': 'inicio_temprano'
+        }},
+        {'max_tareas': 1000, 'parametros': {
+            'num_search_workers': min(nucleos, 8), 'max_time_in_seconds': 30.0,
+            'linearization_level': 1, 'estrategia': 'automatica'
+        }},
+        # Con modelos muy grandes la relajación lineal cuesta más de lo que ayuda
+        {'max_tareas': None, 'parametros': {
+            'num_search_workers': min(nucleos, 8), 'max_time_in_seconds': 60.0,
+            'linearization_level': 0, 'estrategia': 'automatica'
+        }}
+    ]
+
+
+@lru_cache(maxsize=None)
+def cargar_presets(ruta: str = PRESETS_PATH) -> list:
+    """
+    Lee los presets por tamaño de modelo.
+
+    Se leen una vez por proceso: tras volver a afinar hay que reiniciar el
+    panel o el servicio. La lista devuelta es compartida y no debe modificarse.
+
+    Args:
+        ruta (str): Archivo JSON generado con `--afinar`
+
+    Returns:
+        list: [{'max_tareas': int o None, 'parametros': dict}, ...] de menor a mayor tamaño
+    """
+    if not os.path.exists(ruta):
+        return _presets_por_defecto()
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)['presets']
+
+
+def parametros_para(n_tareas: int, presets: list = None) -> dict:
+    """
+    Elige los parámetros del solver según el número de tareas del modelo.
+
+    Args:
+        n_tareas (int): Tareas (intervalos) del modelo
+        presets (list): Presets a usar, por defecto los de `cargar_presets`
+
+    Returns:
+        dict: Parámetros de CP-SAT más la clave 'estrategia'
+    """
+    presets = presets or cargar_presets()
+    for preset in presets:
+        if preset['max_tareas'] is None or n_tareas <= preset['max_tareas']:
+            return dict(preset['parametros'])
+    return dict(presets[-1]['parametros'])
+
+
+def configurar_solver(solver, parametros: dict):
+    """
+    Aplica los parámetros a un `CpSolver`.
+
+    Cualquier clave distinta de 'estrategia' se copia tal cual a
+    `solver.parameters`, así que los presets admiten cualquier parámetro de CP-SAT.
+    """
+    from ortools.sat import sat_parameters_pb2
+
+    for clave, valor in parametros.items():
+        if clave == 'estrategia':
+            solver.parameters.search_branching = getattr(sat_parameters_pb2.SatParameters, ESTRATEGIAS[valor])
+        else:
+            setattr(solver.parameters, clave, valor)
+
+
+def resolver_portafolio(model, parametros: dict, configuraciones: list = None) -> tuple:
+    """
+    Resuelve el modelo con varias configuraciones a la vez y se queda con la primera concluyente.
+
+    Los núcleos se reparten entre las configuraciones. En cuanto una demuestra
+    el óptimo o la inviabilidad se detiene al resto; si todas agotan el tiempo,
+    gana la mejor solución encontrada.
+
+    Args:
+        model: `CpModel` a resolver
+        parametros (dict): Parámetros base, normalmente los de `parametros_para`
+        configuraciones (list): Variantes que compiten, por defecto `PORTAFOLIO`
+
+    Returns:
+        tuple: (solver, status) del solver ganador, para leer los valores de la solución
+    """
+    from ortools.sat.python import cp_model
+
+    configuraciones = configuraciones or PORTAFOLIO
+    nucleos = max(1, parametros.get('num_search_workers', os.cpu_count() or 1) // len(configuraciones))
+    solvers = []
+    for configuracion in configuraciones:
+        solver = cp_model.CpSolver()
+        configurar_solver(solver, {**parametros, **configuracion, 'num_search_workers': nucleos})
+        solvers.append(solver)
+
+    estados = [None] * len(solvers)
+    ganador = []
+    lock = threading.Lock()
+
+    def competir(i):
+        with lock:
+            if ganador:
+                return None
+        return solvers[i].Solve(model)
+
+    with ThreadPoolExecutor(max_workers=len(solvers)) as executor:
+        futuros = {executor.submit(competir, i): i for i in range(len(solvers))}
+        pendientes = set(futuros)
+        while pendientes:
+            hechos, pendientes = wait(pendientes, timeout=0.05 if ganador else None, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                i = futuros[futuro]
+                estados[i] = futuro.result()
+                if estados[i] in (cp_model.OPTIMAL, cp_model.INFEASIBLE) and not ganador:
+                    with lock:
+                        ganador.append(i)
+            # StopSearch no tiene efecto en un solver que aún no ha entrado en
+            # Solve, así que se repite hasta que todos terminan
+            if ganador:
+                for futuro in pendientes:
+                    solvers[futuros[futuro]].StopSearch()
+
+    if ganador:
+        return solvers[ganador[0]], estados[ganador[0]]
+
+    factibles = [i for i, status in enumerate(estados) if status == cp_model.FEASIBLE]
+    if factibles:
+        mejor = min(factibles, key=lambda i: solvers[i].ObjectiveValue())
+        return solvers[mejor], estados[mejor]
+    primero = next(i for i, status in enumerate(estados) if status is not None)
+    return solvers[primero], estados[primero]
+
+
+def pedidos_sinteticos(n_pedidos: int, semilla: int = 0) -> dict:
+    """
+    Genera pedidos con rutas y duraciones parecidas a las de planta.
+
+    La fecha de entrega es la carga total de trabajo, de modo que siempre
+    existe un plan válido y lo que se compara es el makespan.
+    """
+    rng = random.Random(semilla)
+    procesos = list(SECUENCIA_PROCESOS)
+    pedidos = {}
+    for n in range(n_pedidos):
+        ruta = sorted(rng.sample(procesos, rng.randint(2, 5)), key=SECUENCIA_PROCESOS.get)
+        pedidos[f"S{n:04d}"] = {
+            'numero_pedido': f"S{n:04d}",
+            'nombre': f"Artículo sintético {n}",
+            'familia': 'Sintética',
+            'cantidad': rng.randint(1, 500),
+            'procesos': [
+                [proceso, rng.choice([0.5, 1, 1.5, 2, 3]), 'Sin especificar', f"S{n:04d}", 'Por Asignar']
+                for proceso in ruta
+            ]
+        }
+
+    carga = sum(duracion_en_jornadas(p[1]) for data in pedidos.values() for p in data['procesos'])
+    for data in pedidos.values():
+        data['fecha_entrega'] = carga
+    return pedidos
+
+
+def afinar(tamanos: tuple = (10, 40, 120), limite_segundos: float = None, semilla: int = 0) -> list:
+    """
+    Busca los mejores parámetros para cada tamaño de modelo con cargas sintéticas.
+
+    Prueba combinaciones de núcleos, nivel de linealización y estrategia,
+    descarta los planes que no pasan `validar_plan` y elige el de menor
+    makespan y, a igualdad, el más rápido.
+
+    Args:
+        tamanos (tuple): Número de pedidos de cada carga sintética
+        limite_segundos (float): Tiempo máximo por prueba, por defecto el del preset
+        semilla (int): Semilla de las cargas sintéticas
+
+    Returns:
+        list: Presets en el formato de `cargar_presets`
+    """
+    from ortools_sergar import planificar_produccion
+    from validacion import validar_plan
+
+    nucleos = os.cpu_count() or 1
+    opciones_nucleos = sorted({1, max(1, nucleos // 2), min(nucleos, 8)})
+    presets = []
+    for n_pedidos in sorted(tamanos):
+        pedidos = pedidos_sinteticos(n_pedidos, semilla)
+        n_tareas = sum(len(data['procesos']) for data in pedidos.values())
+        limite_preset = parametros_para(n_tareas, _presets_por_defecto())['max_time_in_seconds']
+        limite = limite_segundos or limite_preset
+
+        mejor = None
+        for num_workers in opciones_nucleos:
+            for linearization_level in (0, 1, 2):
+                for estrategia in ('automatica', 'inicio_temprano'):
+                    parametros = {
+                        'num_search_workers': num_workers, 'max_time_in_seconds': float(limite),
+                        'linearization_level': linearization_level, 'estrategia': estrategia
+                    }
+                    t0 = time.perf_counter()
+                    plan, makespan, _ = planificar_produccion(pedidos, parametros=parametros)
+                    segundos = time.perf_counter() - t0
+                    if plan is None or not validar_plan(plan, pedidos)['valido']:
+                        continue
+
+                    puntuacion = (makespan, segundos)
+                    print(f"{n_tareas} tareas {parametros}: makespan {makespan} en {segundos:.2f} s")
+                    if mejor is None or puntuacion < mejor[0]:
+                        mejor = (puntuacion, parametros)
+
+        if mejor is not None:
+            # El límite de las pruebas solo acota el afinado; en planta se usa el del tamaño
+            presets.append({'max_tareas': n_tareas, 'parametros': {**mejor[1], 'max_time_in_seconds': limite_preset}})
+
+    # Los modelos mayores que la última carga usan sus mismos parámetros
+    if presets:
+        presets[-1]['max_tareas'] = None
+    return presets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parámetros de CP-SAT por tamaño de modelo")
+    parser.add_argument('--afinar', action='store_true', help="Generar presets con cargas sintéticas")
+    parser.add_argument('--salida', default=PRESETS_PATH, help="Archivo JSON de presets")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10, 40, 120], help="Pedidos por carga sintética")
+    parser.add_argument('--limite', type=float, help="Segundos por prueba al afinar")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.afinar:
+        print(json.dumps(cargar_presets(args.salida), indent=2, ensure_ascii=False))
+        return
+
+    presets = afinar(tuple(args.tamanos), args.limite, args.semilla)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump({'nucleos': os.cpu_count(), 'presets': presets}, f, indent=2, ensure_ascii=False)
+    print(f"Presets guardados en {args.salida}")
+
+
+if __name__ == '__main__':
+    main()
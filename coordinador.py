@@ -0,0 +1,70 @@
+import threading
+from datetime import datetime
+
+from agrupacion_lotes import planificar_por_lotes
+from utils import huella_pedidos
+
+
+class CoordinadorPlanificacion:
+    """
+    Plan compartido por todas las sesiones del panel.
+
+    Guarda el último plan junto con la huella de los pedidos que lo generaron.
+    Las sesiones que piden el plan de los mismos pedidos lo reciben sin
+    resolver de nuevo; si los pedidos cambian, solo una sesión resuelve y las
+    demás esperan a su resultado. Nunca hay más de una resolución en marcha.
+
+    No hace falta invalidarlo: una carga nueva o un avance que cambia lo que
+    queda por hacer cambian los pedidos y, con ellos, la huella.
+    """
+
+    def __init__(self, planificar=planificar_por_lotes):
+        """
+        Args:
+            planificar: Función con la firma de `planificar_produccion`
+        """
+        self._planificar = planificar
+        self._condicion = threading.Condition()
+        self._huella = None
+        self._resultado = None
+        self._en_curso = None
+        # Número de planes calculados y momento del último
+        self.version = 0
+        self.actualizado = None
+
+    def obtener_plan(self, pedidos: dict, **kwargs) -> tuple:
+        """
+        Devuelve el plan de los pedidos, resolviéndolo solo si no está calculado.
+
+        Args:
+            pedidos (dict): Diccionario con los pedidos a planificar
+            **kwargs: Argumentos adicionales para la función de planificación
+
+        Returns:
+            tuple: (plan, makespan, status)
+        """
+        clave = huella_pedidos({'pedidos': pedidos, 'opciones': kwargs})
+        with self._condicion:
+            while True:
+                if self._huella == clave:
+                    return self._resultado
+                if self._en_curso is None:
+                    self._en_curso = clave
+                    break
+                # Otra sesión está resolviendo: esperar y volver a comprobar
+                self._condicion.wait()
+
+        # Liberar siempre la resolución, también si Streamlit detiene o relanza
+        # la ejecución (excepciones que no derivan de Exception)
+        try:
+            resultado = self._planificar(pedidos, **kwargs)
+            with self._condicion:
+                self._huella = clave
+                self._resultado = resultado
+                self.version += 1
+                self.actualizado = datetime.now()
+        finally:
+            with self._condicion:
+                self._en_curso = None
+                self._condicion.notify_all()
+        return resultado
@@ -1,15 +1,39 @@
-from ortools.sat.python import cp_model
+from utils import duracion_en_jornadas
+from presolve import analizar_pedidos
+from configuracion_solver import parametros_para, configurar_solver, resolver_portafolio
 
-def planificar_produccion(pedidos):
+def planificar_produccion(pedidos, ventanas_bloqueadas=None, presolve=True, parametros=None, portafolio=False):
     """
     Planifica la producción de múltiples pedidos.
     
     Args:
-        pedidos (dict): Diccionario con los pedidos a planificar
+        pedidos (dict): Diccionario con los pedidos a planificar. Si un pedido
+            incluye "desfases", el proceso i+1 puede empezar desfases[i] jornadas
+            después del inicio del proceso i en lugar de esperar a que termine.
+            Los procesos cuya posición está en "iniciados" ya están en curso en
+            planta: empiezan en la jornada 0 sin esperar a los anteriores y no
+            compiten entre sí, pero el resto de tareas de su proceso esperan a
+            que termine el más largo
+        ventanas_bloqueadas (dict): Periodos sin capacidad por proceso,
+            {proceso: [(inicio, fin), ...]} en jornadas con fin exclusivo
+        presolve (bool): Ajustar los dominios con `presolve.analizar_pedidos` y
+            devolver INFEASIBLE sin resolver si algún pedido o proceso no cabe
+        parametros (dict): Parámetros de CP-SAT; por defecto se eligen según el
+            tamaño del modelo con `configuracion_solver.parametros_para`
+        portafolio (bool): Resolver con varias configuraciones en paralelo y
+            quedarse con la primera concluyente
         
     Returns:
         tuple: (plan, makespan, status)
     """
+    # OR-Tools se importa al planificar para no cargarlo al importar el módulo
+    from ortools.sat.python import cp_model
+
+    # Cotas previas a la resolución
+    analisis = analizar_pedidos(pedidos) if presolve else None
+    if analisis and (analisis['pedidos_inviables'] or analisis['procesos_sobrecargados']):
+        return None, None, cp_model.INFEASIBLE
+    
     # Crear modelo
     model = cp_model.CpModel()
     
@@ -21,37 +45,69 @@ def planificar_produccion(pedidos):
     
     # Calcular el horizonte máximo de planificación (máxima fecha de entrega)
     horizonte_max = max(data["fecha_entrega"] for data in pedidos.values())
-    makespan = model.NewIntVar(0, horizonte_max, "makespan")
+    makespan = model.NewIntVar(analisis['cota_makespan'] if analisis else 0, horizonte_max, "makespan")
     
     # Agrupar tareas por tipo de proceso
     procesos_por_tipo = {}
+    # Jornadas que el proceso sigue ocupado con tareas ya en curso
+    en_curso = {}
     
     # Crear variables para cada tarea
     for pedido, data in pedidos.items():
+        prev_start = None
         prev_end = None
+        desfases = data.get("desfases")
+        iniciados = set(data.get("iniciados", ()))
         for i, (proceso, duracion, subproceso, ot, operario) in enumerate(data["procesos"]):
             # Convertir duración a días enteros (redondeando hacia arriba)
-            duracion_dias = int(duracion) if isinstance(duracion, int) or duracion.is_integer() else int(duracion) + 1
+            duracion_dias = duracion_en_jornadas(duracion)
             
-            start = model.NewIntVar(0, data["fecha_entrega"], f"start_{pedido}_{i}")
-            end = model.NewIntVar(0, data["fecha_entrega"], f"end_{pedido}_{i}")
+            if analisis:
+                inicio_min = analisis['inicio_min'][(pedido, i)]
+                inicio_max = analisis['inicio_max'][(pedido, i)]
+                start = model.NewIntVar(inicio_min, inicio_max, f"start_{pedido}_{i}")
+                end = model.NewIntVar(inicio_min + duracion_dias, inicio_max + duracion_dias, f"end_{pedido}_{i}")
+            else:
+                start = model.NewIntVar(0, data["fecha_entrega"], f"start_{pedido}_{i}")
+                end = model.NewIntVar(0, data["fecha_entrega"], f"end_{pedido}_{i}")
             interval = model.NewIntervalVar(start, duracion_dias, end, f"interval_{pedido}_{i}")
             
-            # Agrupar por tipo de proceso
-            if proceso not in procesos_por_tipo:
-                procesos_por_tipo[proceso] = []
-            procesos_por_tipo[proceso].append(interval)
+            # Agrupar por tipo de proceso; las tareas en curso ya se hacen a la vez en planta
+            if i in iniciados:
+                en_curso[proceso] = max(en_curso.get(proceso, 0), duracion_dias)
+            else:
+                procesos_por_tipo.setdefault(proceso, []).append(interval)
             
             # Restricción de secuencia dentro del mismo pedido
-            if prev_end is not None:
+            if i in iniciados:
+                model.Add(start == 0)
+            elif desfases is not None and prev_start is not None:
+                model.Add(start >= prev_start + desfases[i - 1])
+            elif prev_end is not None:
                 model.Add(start >= prev_end)
             
+            prev_start = start
             prev_end = end
             start_times[(pedido, i)] = start
             end_times[(pedido, i)] = end
             task_intervals.append(interval)
             all_tasks.append((pedido, i, start, proceso, duracion_dias, subproceso, ot, operario))
     
+    # Reservar el proceso mientras duren sus tareas en curso
+    for proceso, duracion_dias in en_curso.items():
+        procesos_por_tipo.setdefault(proceso, []).append(
+            model.NewFixedSizeIntervalVar(0, duracion_dias, f"en_curso_{proceso}")
+        )
+
+    # Reservar los periodos sin capacidad de cada proceso
+    for proceso, ventanas in (ventanas_bloqueadas or {}).items():
+        if proceso not in procesos_por_tipo:
+            continue
+        for j, (inicio, fin) in enumerate(ventanas):
+            procesos_por_tipo[proceso].append(
+                model.NewFixedSizeIntervalVar(inicio, fin - inicio, f"bloqueo_{proceso}_{j}")
+            )
+    
     # Añadir restricciones de no solapamiento para cada tipo de proceso
     for proceso, intervals in procesos_por_tipo.items():
         if len(intervals) > 1:
@@ -61,15 +117,25 @@ def planificar_produccion(pedidos):
     model.AddMaxEquality(makespan, [end_times[key] for key in end_times])
     model.Minimize(makespan)
     
-    # Resolver
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    # Empezar primero lo que antes puede empezar; los parámetros deciden si se sigue
+    model.AddDecisionStrategy(
+        [start_times[key] for key in start_times], cp_model.CHOOSE_LOWEST_MIN, cp_model.SELECT_MIN_VALUE
+    )
+    
+    # Resolver con los parámetros adecuados al tamaño del modelo
+    parametros = parametros or parametros_para(len(all_tasks))
+    if portafolio:
+        solver, status = resolver_portafolio(model, parametros)
+    else:
+        solver = cp_model.CpSolver()
+        configurar_solver(solver, parametros)
+        status = solver.Solve(model)
     
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
         plan = []
         for (pedido, i), start in start_times.items():
             proceso, duracion, subproceso, ot, operario = pedidos[pedido]["procesos"][i]
-            duracion_dias = int(duracion) if isinstance(duracion, int) or duracion.is_integer() else int(duracion) + 1
+            duracion_dias = duracion_en_jornadas(duracion)
             plan.append((
                 solver.Value(start),
                 pedido,
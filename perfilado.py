@@ -0,0 +1,46 @@
+import cProfile
+import io
+import os
+import pstats
+from datetime import datetime
+
+
+def iniciar_perfil() -> cProfile.Profile:
+    """Empieza a perfilar el hilo actual (la ejecución del script de Streamlit)."""
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+
+def guardar_perfil(perfil: cProfile.Profile, directorio: str, top: int = 30, etiqueta: str = 'app') -> str:
+    """
+    Detiene el perfil y lo guarda para compararlo con otras ejecuciones.
+
+    Escribe dos archivos con el mismo nombre base:
+    - `.prof`: estadísticas de cProfile, para abrir con snakeviz o flameprof
+      como gráfico de llamas.
+    - `.txt`: las `top` funciones con más tiempo acumulado y con más tiempo propio.
+
+    Args:
+        perfil (cProfile.Profile): Perfil devuelto por `iniciar_perfil`
+        directorio (str): Carpeta donde guardar los perfiles
+        top (int): Funciones por tabla
+        etiqueta (str): Prefijo del nombre de los archivos
+
+    Returns:
+        str: Ruta del archivo `.prof`
+    """
+    perfil.disable()
+    os.makedirs(directorio, exist_ok=True)
+    base = os.path.join(directorio, f"{etiqueta}-{datetime.now():%Y%m%d-%H%M%S-%f}")
+    perfil.dump_stats(base + '.prof')
+
+    tabla = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=tabla).strip_dirs()
+    for orden in ('cumulative', 'tottime'):
+        tabla.write(f"=== Top {top} por {orden} ===\n")
+        estadisticas.sort_stats(orden).print_stats(top)
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(tabla.getvalue())
+
+    return base + '.prof'
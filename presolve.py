@@ -0,0 +1,105 @@
+from utils import duracion_en_jornadas
+
+
+def analizar_pedidos(pedidos: dict) -> dict:
+    """
+    Calcula cotas de cada tarea antes de resolver el modelo.
+
+    - Inicio mínimo: suma de las duraciones (o desfases) de los procesos previos.
+    - Inicio máximo: fecha de entrega menos el trabajo que queda en la ruta.
+    - Los procesos "iniciados" empiezan en la jornada 0 y no dependen de los anteriores.
+      No compiten entre sí por su proceso, pero lo ocupan hasta que acaba el más largo.
+    - Cota inferior del makespan: la mayor entre el final más temprano de
+      cada pedido y la carga de cada proceso desde su primer inicio posible.
+
+    Detecta además los pedidos que no caben en su plazo y los procesos cuya
+    carga no cabe antes de las fechas límite de sus tareas, para no gastar
+    tiempo del solver en demostrarlo.
+
+    Args:
+        pedidos (dict): Diccionario con los pedidos a planificar
+
+    Returns:
+        dict: {
+            'inicio_min': {(pedido, i): jornada},
+            'inicio_max': {(pedido, i): jornada},
+            'cota_makespan': int,
+            'pedidos_inviables': {pedido: motivo},
+            'procesos_sobrecargados': {proceso: [pedidos]}
+        }
+    """
+    inicio_min = {}
+    inicio_max = {}
+    pedidos_inviables = {}
+    tareas_por_proceso = {}
+    en_curso = {}
+    cota_makespan = 0
+
+    for pedido, data in pedidos.items():
+        procesos = data["procesos"]
+        duraciones = [duracion_en_jornadas(proceso_info[1]) for proceso_info in procesos]
+        # Separación mínima entre el inicio de un proceso y el del siguiente
+        desfases = data.get("desfases") or duraciones[:-1]
+        iniciados = set(data.get("iniciados", ()))
+
+        inicio = 0
+        for i, duracion in enumerate(duraciones):
+            if i in iniciados:
+                inicio = 0
+            inicio_min[(pedido, i)] = inicio
+            if i < len(desfases):
+                inicio += desfases[i]
+
+        limite = data["fecha_entrega"]
+        for i in range(len(duraciones) - 1, -1, -1):
+            limite = min(limite, data["fecha_entrega"] - duraciones[i])
+            if i in iniciados:
+                inicio_max[(pedido, i)] = min(limite, 0)
+                # Los procesos anteriores no retrasan a uno ya iniciado
+                limite = data["fecha_entrega"]
+            else:
+                inicio_max[(pedido, i)] = limite
+                if i > 0:
+                    limite -= desfases[i - 1]
+
+        for i, duracion in enumerate(duraciones):
+            if inicio_max[(pedido, i)] < inicio_min[(pedido, i)]:
+                trabajo = inicio_min[(pedido, len(duraciones) - 1)] + duraciones[-1]
+                pedidos_inviables[pedido] = (
+                    f"La ruta necesita al menos {trabajo} jornadas y la entrega es en {data['fecha_entrega']}"
+                )
+                break
+
+        if duraciones:
+            cota_makespan = max(cota_makespan, inicio_min[(pedido, len(duraciones) - 1)] + duraciones[-1])
+
+        for i, (proceso_info, duracion) in enumerate(zip(procesos, duraciones)):
+            if i in iniciados:
+                en_curso[proceso_info[0]] = max(en_curso.get(proceso_info[0], 0), duracion)
+                continue
+            tareas_por_proceso.setdefault(proceso_info[0], []).append(
+                (inicio_max[(pedido, i)] + duracion, inicio_min[(pedido, i)], duracion, pedido)
+            )
+
+    procesos_sobrecargados = {}
+    for proceso, tareas in tareas_por_proceso.items():
+        # Nada más puede empezar en el proceso mientras sigan sus tareas en curso
+        primer_inicio = max(min(tarea[1] for tarea in tareas), en_curso.get(proceso, 0))
+        cota_makespan = max(cota_makespan, primer_inicio + sum(tarea[2] for tarea in tareas))
+
+        # Las tareas que deben acabar antes de cada fecha límite tienen que caber hasta ella
+        tareas.sort()
+        carga = primer_inicio
+        for fin_max, _, duracion, _ in tareas:
+            carga += duracion
+            if carga > fin_max:
+                procesos_sobrecargados[proceso] = sorted({tarea[3] for tarea in tareas if tarea[0] <= fin_max})
+                break
+
+    return {
+        'inicio_min': inicio_min,
+        'inicio_max': inicio_max,
+        'cota_makespan': cota_makespan,
+        'pedidos_inviables': pedidos_inviables,
+        'procesos_sobrecargados': procesos_sobrecargados
+    }
@@ -0,0 +1,113 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils import procesar_nombre_proceso, SECUENCIA_PROCESOS
+
+# Flattened IT columns of an article, as produced by `read_articles`, in route order.
+# Bit i of an article's `it_mask` is set when column IT_COLUMNS[i] has a value.
+IT_COLUMNS = [
+    'IT01_Dibujo', 'IT02_Pantalla', 'IT03_Corte',
+    'IT04_Impresion._', 'IT04_Impresion.digital', 'IT04_Impresion.serigrafia',
+    'IT05_Grabado', 'IT06_Adhesivo', 'IT06_Laminado',
+    'IT07_Mecanizado._', 'IT07_Mecanizado.plotter', 'IT07_Mecanizado.fresado',
+    'IT07_Mecanizado.troquelado', 'IT07_Mecanizado.laser', 'IT07_Mecanizado.semicorte',
+    'IT07_Mecanizado.plegado', 'IT07_Mecanizado.burbuja_teclas', 'IT07_Mecanizado.hendido',
+    'IT07_Mecanizado.cepillado',
+    'IT07_Taladro', 'IT07_Can_romo', 'IT07_Numerado', 'IT08_Embalaje'
+]
+IT_BITS = {column: np.uint32(1 << i) for i, column in enumerate(IT_COLUMNS)}
+
+# Repeated text columns stored as categoricals
+CATEGORICAL_COLUMNS = ['nombre', 'familia']
+
+
+def encode_it_flags(df: pd.DataFrame) -> np.ndarray:
+    """
+    Packs the IT columns of each article into an integer bitmask.
+
+    A process is flagged when its column is neither null nor an empty string.
+    Columns missing from `df` are treated as empty.
+
+    Parameters
+    ----------
+    df : pd.DataFrame. Articles with the flattened IT columns.
+
+    Returns
+    -------
+    np.ndarray
+        One uint32 mask per row.
+    """
+    mask = np.zeros(len(df), dtype=np.uint32)
+    for column, bit in IT_BITS.items():
+        if column in df.columns:
+            values = df[column]
+            mask[(values.notna() & ~values.isin([''])).to_numpy()] |= bit
+    return mask
+
+
+def decode_it_flags(mask) -> pd.DataFrame:
+    """
+    Unpacks bitmasks into one boolean column per IT column.
+
+    Parameters
+    ----------
+    mask : array-like. Masks built by `encode_it_flags`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Boolean frame with the `IT_COLUMNS` as columns.
+    """
+    mask = np.asarray(mask, dtype=np.uint32)
+    bits = (mask[:, None] >> np.arange(len(IT_COLUMNS), dtype=np.uint32)) & 1
+    return pd.DataFrame(bits.astype(bool), columns=IT_COLUMNS)
+
+
+@lru_cache(maxsize=None)
+def route_for_mask(mask: int) -> tuple:
+    """
+    Production route of the articles sharing a bitmask.
+
+    Each flagged column becomes a (proceso, subproceso) pair named with
+    `procesar_nombre_proceso`, ordered by `SECUENCIA_PROCESOS`. The number of
+    distinct masks is small, so every route is computed once.
+
+    Returns
+    -------
+    tuple
+        ((proceso, subproceso), ...) in production order.
+    """
+    route = []
+    for i, column in enumerate(IT_COLUMNS):
+        if mask >> i & 1:
+            proceso, _, subproceso = column.partition('.')
+            nombre_completo = proceso if subproceso in ('', '_') else f"{proceso} {subproceso}"
+            route.append(procesar_nombre_proceso(nombre_completo))
+    route.sort(key=lambda paso: SECUENCIA_PROCESOS.get(paso[0], 999))
+    return tuple(route)
+
+
+def compact_articles(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact in-memory representation of the articles frame.
+
+    Replaces the IT columns with a single `it_mask` column and stores the
+    repeated text columns as categoricals.
+
+    Parameters
+    ----------
+    df : pd.DataFrame. Articles as returned by `read_articles` or `read_articles_arrow`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The same rows without IT columns, plus `it_mask`.
+    """
+    compact = df.drop(columns=[column for column in IT_COLUMNS if column in df.columns])
+    compact['it_mask'] = encode_it_flags(df)
+    for column in CATEGORICAL_COLUMNS:
+        if column in compact.columns:
+            compact[column] = compact[column].astype('category')
+    return compact
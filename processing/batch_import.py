@@ -0,0 +1,147 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from processing.transformations import process_data
+from bigquery.sinks import sink_from_uri
+
+
+def parse_file(path: str) -> list:
+    """
+    Reads one ERP Excel export and transforms it into orders.
+
+    Runs in a worker process, so it only returns plain Python objects.
+    """
+    df = pd.read_excel(path, decimal=",", date_format="%d/%m/%Y")
+    return process_data(df)
+
+
+def merge_orders(orders_by_file: list) -> list:
+    """
+    Merges and deduplicates the orders coming from several exports.
+
+    Orders are keyed by `numero_pedido` and their articles by `OT_ID_Linea`.
+    Files must be given oldest first: when the same order or article appears
+    more than once, the last occurrence wins.
+
+    Parameters
+    ----------
+    orders_by_file : list. One list of orders (as returned by `process_data`) per file.
+
+    Returns
+    -------
+    list
+        The merged orders, sorted by order number.
+    """
+    merged = {}
+
+    for orders in orders_by_file:
+        for order in orders:
+            current = merged.get(order['numero_pedido'])
+            if current is None:
+                current = {**order, 'articulos': {}}
+                merged[order['numero_pedido']] = current
+            else:
+                current.update({k: v for k, v in order.items() if k != 'articulos'})
+
+            for article in order['articulos']:
+                current['articulos'][article['OT_ID_Linea']] = article
+
+    return [
+        {**order, 'articulos': list(order['articulos'].values())}
+        for _, order in sorted(merged.items())
+    ]
+
+
+def import_directory(directory: str, sink, pattern: str = '*.xlsx', max_workers: int = None,
+                     allow_partial: bool = False) -> dict:
+    """
+    Parses every export in a directory in parallel and writes the merged orders to a sink.
+
+    Nothing is written if any file fails to parse, since sinks such as BigQuery
+    replace the whole table and a partial import would drop the missing orders.
+
+    Parameters
+    ----------
+    directory : str. Directory containing the ERP exports.
+    sink : object exposing `write(orders)`, see `bigquery.sinks`.
+    pattern : str. Glob pattern used to select the files.
+    max_workers : int. Size of the process pool, defaults to the number of CPUs.
+    allow_partial : bool. Write the orders of the files that parsed even if others failed.
+
+    Returns
+    -------
+    dict
+        Summary with the files read, the files that failed and the number of orders written.
+    """
+    # Sorted by modification time so newer exports override older ones
+    paths = sorted(glob.glob(os.path.join(directory, pattern)), key=os.path.getmtime)
+
+    results = {}
+    errors = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(parse_file, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                errors[path] = str(e)
+
+    if errors and not allow_partial:
+        return {'files': len(results), 'errors': errors, 'orders': 0}
+
+    orders = merge_orders([results[path] for path in paths if path in results])
+    if orders:
+        sink.write(orders)
+
+    return {
+        'files': len(results),
+        'errors': errors,
+        'orders': len(orders)
+    }
+
+
+def main(argv: list = None) -> int:
+    load_dotenv()
+
+    project_id = os.getenv('BIGQUERY_PROJECT_ID')
+    dataset_id = os.getenv('BIGQUERY_DATASET_ID')
+    table_name = os.getenv('BIGQUERY_TABLE_NAME')
+
+    parser = argparse.ArgumentParser(description="Batch import of ERP order exports")
+    parser.add_argument('directory', help="Directory with the Excel exports")
+    parser.add_argument(
+        '--sink',
+        default=f"bq://{project_id}.{dataset_id}.{table_name}",
+        help="Destination: bq://project.dataset.table, sqlite:///file.db or file.jsonl"
+    )
+    parser.add_argument('--pattern', default='*.xlsx', help="Glob pattern for the exports")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument(
+        '--allow-partial', action='store_true',
+        help="Write the orders that parsed even if some files failed (replaces the table with a partial set)"
+    )
+    args = parser.parse_args(argv)
+
+    sink = sink_from_uri(args.sink, os.getenv('BIGQUERY_CREDENTIALS_PATH'))
+
+    summary = import_directory(args.directory, sink, args.pattern, args.workers, args.allow_partial)
+
+    for path, error in summary['errors'].items():
+        print(f"Error processing {path}: {error}", file=sys.stderr)
+    if summary['errors'] and not args.allow_partial:
+        print("Nothing written: fix the failing files or use --allow-partial", file=sys.stderr)
+        return 1
+    print(f"{summary['files']} files read, {summary['orders']} orders written to {sink!r}")
+
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+INICIO = 'inicio'
+FIN = 'fin'
+
+
+class RegistroProgreso:
+    """
+    Registro de avance de planta: inicios y finales reales de cada tarea.
+
+    Los eventos se guardan en una tabla SQLite de solo inserción y se aplican
+    a índices en memoria, de modo que cada evento actualiza únicamente el
+    estado de su tarea y el puntero de la primera tarea pendiente de su OT.
+    Consultar el estado de una tarea es O(1).
+    """
+
+    def __init__(self, ruta: str = ':memory:'):
+        """
+        Args:
+            ruta (str): Archivo SQLite del registro
+        """
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS eventos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                momento TEXT NOT NULL,
+                ot TEXT NOT NULL,
+                proceso TEXT NOT NULL,
+                subproceso TEXT NOT NULL,
+                tipo TEXT NOT NULL CHECK (tipo IN ('inicio', 'fin'))
+            )
+            """
+        )
+        self._conn.commit()
+
+        # (ot, proceso, subproceso) -> {'inicio': datetime, 'fin': datetime}
+        self._tareas = {}
+        # ot -> [(proceso, subproceso), ...] en orden de ruta
+        self._rutas = {}
+        # (ot, proceso, subproceso) -> posición en la ruta de su OT
+        self._posiciones = {}
+        # ot -> posición de la primera tarea sin finalizar
+        self._siguiente = {}
+
+        for momento, ot, proceso, subproceso, tipo in self._conn.execute(
+            "SELECT momento, ot, proceso, subproceso, tipo FROM eventos ORDER BY id"
+        ):
+            self._aplicar((ot, proceso, subproceso), tipo, datetime.fromisoformat(momento))
+
+    def registrar_ruta(self, ot, ruta: list):
+        """
+        Indica la secuencia de procesos de una OT para saber qué tarea está lista.
+
+        Args:
+            ot: Identificador de la OT
+            ruta (list): Lista de (proceso, subproceso) en orden
+        """
+        ot = str(ot)
+        ruta = [tuple(paso) for paso in ruta]
+        with self._lock:
+            if self._rutas.get(ot) == ruta:
+                return
+            self._rutas[ot] = ruta
+            for posicion, (proceso, subproceso) in enumerate(ruta):
+                self._posiciones[(ot, proceso, subproceso)] = posicion
+            self._siguiente[ot] = 0
+            self._avanzar(ot)
+
+    def registrar_evento(self, ot, proceso: str, subproceso: str, tipo: str, momento: datetime = None):
+        """
+        Añade un inicio o final de tarea al registro.
+
+        Args:
+            ot: Identificador de la OT
+            proceso (str): Proceso de la tarea
+            subproceso (str): Subproceso de la tarea
+            tipo (str): INICIO o FIN
+            momento (datetime): Momento del evento, por defecto ahora
+        """
+        if tipo not in (INICIO, FIN):
+            raise ValueError(f"Tipo de evento no válido: {tipo}")
+
+        momento = momento or datetime.now()
+        clave = (str(ot), proceso, subproceso)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO eventos (momento, ot, proceso, subproceso, tipo) VALUES (?, ?, ?, ?, ?)",
+                (momento.isoformat(), *clave, tipo)
+            )
+            self._conn.commit()
+            self._aplicar(clave, tipo, momento)
+
+    def _aplicar(self, clave: tuple, tipo: str, momento: datetime):
+        self._tareas.setdefault(clave, {})[tipo] = momento
+        if tipo == FIN and clave[0] in self._rutas:
+            self._avanzar(clave[0])
+
+    def _avanzar(self, ot: str):
+        """Mueve el puntero de la OT tras las tareas ya finalizadas."""
+        ruta = self._rutas[ot]
+        siguiente = self._siguiente[ot]
+        while siguiente < len(ruta) and FIN in self._tareas.get((ot, *ruta[siguiente]), {}):
+            siguiente += 1
+        self._siguiente[ot] = siguiente
+
+    def estado(self, ot, proceso: str, subproceso: str) -> str:
+        """
+        Estado real de una tarea.
+
+        Returns:
+            str: 'Finalizado', 'En Proceso', 'Listo para Activar' o 'Pendiente'
+        """
+        ot = str(ot)
+        eventos = self._tareas.get((ot, proceso, subproceso), {})
+        if FIN in eventos:
+            return 'Finalizado'
+        if INICIO in eventos:
+            return 'En Proceso'
+
+        posicion = self._posiciones.get((ot, proceso, subproceso))
+        if posicion is not None and posicion <= self._siguiente[ot]:
+            return 'Listo para Activar'
+        return 'Pendiente'
+
+    def ot_finalizada(self, ot) -> bool:
+        """Indica si todas las tareas de la ruta de la OT han finalizado."""
+        ot = str(ot)
+        return ot in self._rutas and self._siguiente[ot] == len(self._rutas[ot])
+
+    def pedido_pendiente(self, ot, data: dict) -> tuple[dict, list]:
+        """
+        Ajusta un pedido al estado real de planta antes de planificarlo.
+
+        Quita los procesos finalizados y anota en "iniciados" la posición de
+        los que están en curso, que el planificador fija al principio del plan.
+
+        Args:
+            ot: Identificador de la OT
+            data (dict): Pedido con todos sus procesos
+
+        Returns:
+            tuple[dict, list]: (pedido pendiente, posición en la ruta completa de cada proceso que queda)
+        """
+        procesos = []
+        posiciones = []
+        iniciados = []
+        for posicion, proceso_info in enumerate(data["procesos"]):
+            estado = self.estado(ot, proceso_info[0], proceso_info[2])
+            if estado == 'Finalizado':
+                continue
+            if estado == 'En Proceso':
+                iniciados.append(len(procesos))
+            procesos.append(proceso_info)
+            posiciones.append(posicion)
+
+        pendiente = {**data, "procesos": procesos}
+        if iniciados:
+            pendiente["iniciados"] = iniciados
+        return pendiente, posiciones
+
+    def eventos(self, ot=None) -> list:
+        """Devuelve los eventos registrados, opcionalmente de una sola OT."""
+        consulta = "SELECT momento, ot, proceso, subproceso, tipo FROM eventos"
+        parametros = ()
+        if ot is not None:
+            consulta += " WHERE ot = ?"
+            parametros = (str(ot),)
+        with self._lock:
+            return self._conn.execute(consulta + " ORDER BY id", parametros).fetchall()
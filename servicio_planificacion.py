@@ -0,0 +1,199 @@
+"""
+Servicio local de planificación con API JSON.
+
+Expone `planificar_produccion` por HTTP para que otras herramientas (ERP,
+tabletas de planta) puedan pedir planes sin pasar por el panel de Streamlit.
+
+Uso:
+    python servicio_planificacion.py --puerto 8502 --procesos 2
+
+    curl -X POST --data @pedidos_ejemplo.json http://localhost:8502/planificar
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ortools_sergar import planificar_produccion
+from configuracion_solver import parametros_para
+from utils import huella_pedidos
+
+
+class ServicioOcupado(Exception):
+    """Se alcanzó el máximo de planificaciones pendientes."""
+
+
+def normalizar_pedidos(pedidos: dict) -> dict:
+    """
+    Completa los procesos de cada pedido con el formato que espera el planificador.
+
+    Acepta procesos abreviados como en `pedidos_ejemplo.json` (`[proceso, duracion]`)
+    y los amplía a `[proceso, duracion, subproceso, ot, operario]`.
+
+    Args:
+        pedidos (dict): Diccionario con los pedidos recibidos
+
+    Returns:
+        dict: Diccionario con los pedidos normalizados
+    """
+    if not isinstance(pedidos, dict) or not pedidos:
+        raise ValueError("Se esperaba un objeto JSON con al menos un pedido")
+
+    normalizados = {}
+    for pedido, data in pedidos.items():
+        procesos = []
+        for proceso_info in data['procesos']:
+            proceso, duracion = proceso_info[0], proceso_info[1]
+            subproceso = proceso_info[2] if len(proceso_info) > 2 else "Sin especificar"
+            ot = proceso_info[3] if len(proceso_info) > 3 else pedido
+            operario = proceso_info[4] if len(proceso_info) > 4 else "Por Asignar"
+            procesos.append([proceso, duracion, subproceso, ot, operario])
+
+        normalizados[str(pedido)] = {
+            **data,
+            "fecha_entrega": int(data['fecha_entrega']),
+            "procesos": procesos
+        }
+    return normalizados
+
+
+def resolver(pedidos: dict, nucleos: int = None) -> dict:
+    """
+    Planifica un conjunto de pedidos y devuelve el resultado serializable en JSON.
+
+    Se ejecuta en un proceso del pool, por eso importa OR-Tools aquí.
+
+    Args:
+        pedidos (dict): Pedidos normalizados
+        nucleos (int): Núcleos de CP-SAT para esta resolución; por defecto los del preset
+    """
+    from ortools.sat import cp_model_pb2
+
+    parametros = None
+    if nucleos is not None:
+        n_tareas = sum(len(data['procesos']) for data in pedidos.values())
+        parametros = {**parametros_para(n_tareas), 'num_search_workers': nucleos}
+
+    plan, makespan, status = planificar_produccion(pedidos, parametros=parametros)
+    return {
+        "plan": [list(tarea) for tarea in plan] if plan else [],
+        "makespan": makespan,
+        "estado": cp_model_pb2.CpSolverStatus.Name(status)
+    }
+
+
+class PlanificadorCoalescente:
+    """
+    Reparte planificaciones entre un número acotado de procesos.
+
+    Las peticiones simultáneas para el mismo conjunto de pedidos comparten una
+    única resolución; el resto espera en la cola del pool, de modo que nunca hay
+    más resoluciones en marcha que procesos. Los núcleos de la máquina se
+    reparten entre las resoluciones simultáneas para no sobrecargar el solver.
+    """
+
+    def __init__(self, max_concurrentes: int = 2, max_pendientes: int = 32, executor=None):
+        self.executor = executor or ProcessPoolExecutor(max_workers=max_concurrentes)
+        self.nucleos_por_resolucion = max(1, (os.cpu_count() or 1) // max_concurrentes)
+        self.max_pendientes = max_pendientes
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def planificar(self, pedidos: dict):
+        """
+        Devuelve un Future con el resultado de `resolver` para los pedidos dados.
+
+        Raises:
+            ServicioOcupado: Si ya hay `max_pendientes` planificaciones distintas en espera
+        """
+        clave = huella_pedidos(pedidos)
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                return futuro
+            if len(self._en_curso) >= self.max_pendientes:
+                raise ServicioOcupado(f"Hay {len(self._en_curso)} planificaciones pendientes")
+
+            futuro = self.executor.submit(resolver, pedidos, self.nucleos_por_resolucion)
+            self._en_curso[clave] = futuro
+
+        futuro.add_done_callback(lambda _: self._liberar(clave))
+        return futuro
+
+    def pendientes(self) -> int:
+        with self._lock:
+            return len(self._en_curso)
+
+    def _liberar(self, clave: str):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+
+    def cerrar(self):
+        self.executor.shutdown(wait=True)
+
+
+class ManejadorPlanificacion(BaseHTTPRequestHandler):
+    planificador: PlanificadorCoalescente = None
+
+    def do_GET(self):
+        if self.path != '/salud':
+            self._responder(404, {"error": "Ruta no encontrada"})
+            return
+        self._responder(200, {"ok": True, "pendientes": self.planificador.pendientes()})
+
+    def do_POST(self):
+        if self.path != '/planificar':
+            self._responder(404, {"error": "Ruta no encontrada"})
+            return
+
+        try:
+            longitud = int(self.headers.get('Content-Length', 0))
+            pedidos = normalizar_pedidos(json.loads(self.rfile.read(longitud)))
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._responder(400, {"error": f"Pedidos no válidos: {str(e)}"})
+            return
+
+        try:
+            resultado = self.planificador.planificar(pedidos).result()
+        except ServicioOcupado as e:
+            self._responder(503, {"error": str(e)})
+            return
+        except Exception as e:
+            self._responder(500, {"error": f"Error al planificar: {str(e)}"})
+            return
+
+        self._responder(200, resultado)
+
+    def _responder(self, codigo: int, cuerpo: dict):
+        contenido = json.dumps(cuerpo, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de planificación de producción")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8502)
+    parser.add_argument('--procesos', type=int, default=2, help="Resoluciones simultáneas como máximo; los núcleos de la máquina se reparten entre ellas")
+    parser.add_argument('--max-pendientes', type=int, default=32, help="Conjuntos de pedidos distintos en espera")
+    args = parser.parse_args()
+
+    ManejadorPlanificacion.planificador = PlanificadorCoalescente(args.procesos, args.max_pendientes)
+    servidor = ThreadingHTTPServer((args.host, args.puerto), ManejadorPlanificacion)
+    print(f"Servicio de planificación en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        ManejadorPlanificacion.planificador.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
+import hashlib
+import json
 from datetime import datetime, timedelta
 
+import numpy as np
+
 # Mapeo de procesos IT a nombres legibles
 MAPEO_PROCESOS = {
     'IT01_Dibujo': 'Dibujo',
@@ -64,6 +68,22 @@ COSTES_PROCESOS = {
     'Embalaje': 0.8     # 20% menos costoso que dibujo
 }
 
+# Pesos de cada factor en la prioridad de un pedido
+PESOS_PRIORIDAD = {
+    'tiempo': 0.5,    # Urgencia de la entrega
+    'cantidad': 0.3,  # Número de procesos
+    'estado': 0.2     # Procesos pendientes
+}
+
+def huella_pedidos(pedidos: dict) -> str:
+    """Identifica un conjunto de pedidos independientemente del orden de sus claves."""
+    contenido = json.dumps(pedidos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+def duracion_en_jornadas(duracion) -> int:
+    """Convierte una duración a jornadas enteras (redondeando hacia arriba)."""
+    return int(duracion) if isinstance(duracion, int) or duracion.is_integer() else int(duracion) + 1
+
 def procesar_nombre_proceso(nombre: str) -> tuple[str, str]:
     """
     Procesa el nombre del proceso para obtener el proceso base y subproceso.
@@ -174,7 +194,7 @@ def calcular_fechas_limite_internas(pedido: str, data: dict, fecha_inicio: datet
         print(f"Error al calcular fechas límite internas para pedido {pedido}: {str(e)}")
         return {}  # Retornar diccionario vacío en caso de error
 
-def calcular_prioridad(pedido_id: str, pedido_data: dict) -> float:
+def calcular_prioridad(pedido_id: str, pedido_data: dict, pesos: dict = None) -> float:
     """
     Calcula la prioridad de un pedido basado en varios factores:
     - Tiempo hasta la entrega
@@ -184,10 +204,12 @@ def calcular_prioridad(pedido_id: str, pedido_data: dict) -> float:
     Args:
         pedido_id (str): ID del pedido
         pedido_data (dict): Datos del pedido
+        pesos (dict): Peso de cada factor, por defecto PESOS_PRIORIDAD
         
     Returns:
         float: Valor de prioridad entre 0 y 100
     """
+    pesos = pesos or PESOS_PRIORIDAD
     try:
         # Factor de tiempo (más urgente = mayor prioridad)
         tiempo_hasta_entrega = pedido_data['fecha_entrega']
@@ -202,9 +224,181 @@ def calcular_prioridad(pedido_id: str, pedido_data: dict) -> float:
         factor_estado = procesos_pendientes / cantidad_procesos if cantidad_procesos > 0 else 0
         
         # Calcular prioridad final (0-100)
-        prioridad = (factor_tiempo * 0.5 + factor_cantidad * 0.3 + factor_estado * 0.2) * 100
+        prioridad = (
+            factor_tiempo * pesos['tiempo'] + factor_cantidad * pesos['cantidad'] + factor_estado * pesos['estado']
+        ) * 100
         
         return round(prioridad, 2)
     except Exception as e:
         print(f"Error al calcular prioridad para pedido {pedido_id}: {str(e)}")
-        return 0 
\ No newline at end of file
+        return 0
+
+def preparar_lote(pedidos: dict, ids: list) -> dict:
+    """
+    Pasa los pedidos indicados a arrays para los cálculos por lotes.
+
+    Args:
+        pedidos (dict): Diccionario con los pedidos
+        ids (list): Pedidos a incluir, en el orden de los arrays
+
+    Returns:
+        dict: {
+            'fechas_entrega': jornadas hasta la entrega de cada pedido,
+            'n_procesos': procesos de cada pedido,
+            'pendientes': procesos "Por Asignar" de cada pedido,
+            'duraciones': duración de cada tarea, pedido tras pedido,
+            'inicios': posición de la primera tarea de cada pedido en 'duraciones'
+        }
+    """
+    datos = [pedidos[pedido] for pedido in ids]
+    n_procesos = np.array([len(data['procesos']) for data in datos], dtype=np.int64)
+    return {
+        'fechas_entrega': np.array([data['fecha_entrega'] for data in datos], dtype=np.int64),
+        'n_procesos': n_procesos,
+        'pendientes': np.array(
+            [sum(1 for p in data['procesos'] if p[4] == "Por Asignar") for data in datos], dtype=np.int64
+        ),
+        'duraciones': np.array([p[1] for data in datos for p in data['procesos']], dtype=np.float64),
+        'inicios': np.concatenate(([0], np.cumsum(n_procesos)[:-1])).astype(np.int64)
+    }
+
+def calcular_prioridades_lote(fechas_entrega, n_procesos, pendientes, pesos: dict = None) -> np.ndarray:
+    """
+    Versión por lotes de `calcular_prioridad`.
+
+    Redondea con `np.round`, que escala por 100 y redondea al entero más
+    cercano. Cuando el valor queda justo a mitad de dos centésimas (p. ej.
+    23.025) puede diferir en 0.01 del `round` de la versión escalar, que
+    redondea el valor decimal exacto; en el resto de casos coincide.
+    `comprobar_calculos_lote` verifica ambas versiones.
+
+    Args:
+        fechas_entrega: Jornadas hasta la entrega de cada pedido
+        n_procesos: Número de procesos de cada pedido
+        pendientes: Procesos "Por Asignar" de cada pedido
+        pesos (dict): Peso de cada factor, por defecto PESOS_PRIORIDAD
+
+    Returns:
+        np.ndarray: Prioridad de cada pedido entre 0 y 100
+    """
+    pesos = pesos or PESOS_PRIORIDAD
+    fechas_entrega = np.asarray(fechas_entrega, dtype=np.int64)
+    n_procesos = np.asarray(n_procesos, dtype=np.int64)
+    pendientes = np.asarray(pendientes, dtype=np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor_tiempo = 1 / (fechas_entrega + 1)
+        factor_cantidad = n_procesos / 10
+        factor_estado = np.where(n_procesos > 0, pendientes / n_procesos, 0)
+    prioridad = (
+        factor_tiempo * pesos['tiempo'] + factor_cantidad * pesos['cantidad'] + factor_estado * pesos['estado']
+    ) * 100
+
+    # 0 donde la versión escalar fallaría (entrega en -1)
+    return np.where(fechas_entrega != -1, np.round(prioridad, 2), 0.0)
+
+def calcular_fechas_limite_lote(fechas_entrega, n_procesos, duraciones) -> np.ndarray:
+    """
+    Versión por lotes de `calcular_fechas_limite_internas`, con los mismos resultados.
+
+    Reparte el plazo de cada pedido entre sus procesos en proporción a su
+    duración. Las sumas acumuladas se hacen por filas de una matriz pedidos x
+    procesos para sumar en el mismo orden que la versión escalar.
+
+    Args:
+        fechas_entrega: Jornadas hasta la entrega de cada pedido
+        n_procesos: Número de procesos de cada pedido
+        duraciones: Duración de cada tarea, pedido tras pedido
+
+    Returns:
+        np.ndarray: Jornada límite de cada tarea desde la fecha de inicio
+            (NaN si el pedido no tiene duración total)
+    """
+    fechas_entrega = np.asarray(fechas_entrega, dtype=np.int64)
+    n_procesos = np.asarray(n_procesos, dtype=np.int64)
+    duraciones = np.asarray(duraciones, dtype=np.float64)
+    if duraciones.size == 0:
+        return np.zeros(0)
+
+    fila = np.repeat(np.arange(len(n_procesos)), n_procesos)
+    columna = np.arange(len(duraciones)) - np.repeat(np.cumsum(n_procesos) - n_procesos, n_procesos)
+
+    matriz = np.zeros((len(n_procesos), int(n_procesos.max())))
+    matriz[fila, columna] = duraciones
+    total_dias = np.cumsum(matriz, axis=1)[:, -1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        matriz[fila, columna] = (duraciones / total_dias[fila]) * fechas_entrega[fila]
+    dias_acumulados = np.cumsum(matriz, axis=1)[fila, columna]
+
+    # int() trunca hacia cero, igual que astype
+    return np.where(total_dias[fila] != 0, np.trunc(dias_acumulados), np.nan)
+
+def comprobar_calculos_lote(n_pedidos: int = 300, semilla: int = 0) -> list:
+    """
+    Compara los cálculos por lotes con las versiones escalares en pedidos aleatorios.
+
+    Incluye pedidos con entrega en -1, sin procesos y con duración total 0.
+    Las prioridades pueden diferir como mucho en 0.01 (ver
+    `calcular_prioridades_lote`); las fechas límite deben coincidir.
+
+    Args:
+        n_pedidos (int): Pedidos aleatorios a generar
+        semilla (int): Semilla del generador
+
+    Returns:
+        list: Descripción de cada diferencia encontrada (vacía si coinciden)
+    """
+    import contextlib
+    import io
+    import random
+
+    rng = random.Random(semilla)
+    fecha_inicio = datetime(2024, 1, 1)
+    pedidos = {}
+    for n in range(n_pedidos):
+        tipo = n % 10
+        n_procesos = 0 if tipo == 1 else rng.randint(1, 8)
+        pedidos[str(n)] = {
+            'fecha_entrega': -1 if tipo == 0 else rng.randint(0, 400),
+            'procesos': [
+                ['Dibujo', 0 if tipo == 2 else rng.choice([0.5, 1, 1.5, 2, 3, 7]), 'Sin especificar', str(n),
+                 rng.choice(["Por Asignar", "Operario 1"])]
+                for _ in range(n_procesos)
+            ]
+        }
+
+    ids = list(pedidos)
+    lote = preparar_lote(pedidos, ids)
+    prioridades = calcular_prioridades_lote(lote['fechas_entrega'], lote['n_procesos'], lote['pendientes'])
+    limites = calcular_fechas_limite_lote(lote['fechas_entrega'], lote['n_procesos'], lote['duraciones'])
+
+    diferencias = []
+    # Las versiones escalares avisan por pantalla de los pedidos que no pueden calcular
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, pedido in enumerate(ids):
+            esperada = calcular_prioridad(pedido, pedidos[pedido])
+            if abs(prioridades[i] - esperada) > 0.01 + 1e-9:
+                diferencias.append(f"Prioridad de {pedido}: {prioridades[i]} en lugar de {esperada}")
+
+            esperadas = calcular_fechas_limite_internas(pedido, pedidos[pedido], fecha_inicio)
+            inicio = lote['inicios'][i]
+            for j in range(lote['n_procesos'][i]):
+                limite = limites[inicio + j]
+                if j in esperadas:
+                    correcto = limite == (esperadas[j] - fecha_inicio).days
+                else:
+                    correcto = np.isnan(limite)
+                if not correcto:
+                    diferencias.append(f"Fecha límite de {pedido}, proceso {j}: {limite} en lugar de {esperadas.get(j)}")
+    return diferencias
+
+
+if __name__ == '__main__':
+    import sys
+
+    diferencias = comprobar_calculos_lote()
+    for diferencia in diferencias:
+        print(diferencia)
+    print("Cálculos por lotes:", "con diferencias" if diferencias else "coinciden con las versiones escalares")
+    sys.exit(1 if diferencias else 0)
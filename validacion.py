@@ -0,0 +1,108 @@
+from utils import duracion_en_jornadas
+
+
+def validar_plan(plan: list, pedidos: dict, ventanas_bloqueadas: dict = None) -> dict:
+    """
+    Comprueba que un plan respeta rutas, capacidad de los procesos y fechas de entrega.
+
+    Ordena las tareas por pedido y por proceso y las recorre una vez, así que
+    el coste es O(n log n) aunque el plan tenga decenas de miles de tareas.
+    Sirve para cualquier plan con el formato de `planificar_produccion`.
+
+    Args:
+        plan (list): Lista de (inicio, pedido, orden, nombre, duracion, proceso, subproceso, ot, operario)
+        pedidos (dict): Pedidos planificados
+        ventanas_bloqueadas (dict): Periodos sin capacidad por proceso, {proceso: [(inicio, fin), ...]}
+
+    Returns:
+        dict: {
+            'valido': bool,
+            'violaciones': [{'tipo': ..., 'pedido': ..., ...}, ...],
+            'retrasos': {pedido: jornadas de retraso},
+            'retraso_total': int
+        }
+    """
+    violaciones = []
+    retrasos = {}
+
+    # Rutas: cada pedido tiene todos sus procesos una vez y en orden
+    por_pedido = sorted(plan, key=lambda tarea: (str(tarea[1]), tarea[2]))
+    anterior = None
+    vistos = {}
+    for tarea in por_pedido:
+        inicio, pedido, orden, _, duracion, proceso = tarea[:6]
+        data = pedidos.get(str(pedido))
+        if data is None or not 0 <= orden < len(data["procesos"]):
+            violaciones.append({'tipo': 'tarea_desconocida', 'pedido': pedido, 'orden': orden})
+            anterior = None
+            continue
+
+        vistos[str(pedido)] = vistos.get(str(pedido), 0) + 1
+        esperado = data["procesos"][orden]
+        if proceso != esperado[0] or duracion != duracion_en_jornadas(esperado[1]):
+            violaciones.append({
+                'tipo': 'tarea_distinta', 'pedido': pedido, 'orden': orden,
+                'detalle': f"{proceso} ({duracion}) en lugar de {esperado[0]} ({duracion_en_jornadas(esperado[1])})"
+            })
+
+        if anterior is not None and str(anterior[1]) == str(pedido):
+            if anterior[2] == orden:
+                violaciones.append({'tipo': 'tarea_duplicada', 'pedido': pedido, 'orden': orden})
+            elif orden not in data.get("iniciados", ()):
+                desfases = data.get("desfases")
+                minimo = anterior[0] + (desfases[orden - 1] if desfases else anterior[4])
+                if inicio < minimo:
+                    violaciones.append({
+                        'tipo': 'secuencia', 'pedido': pedido, 'orden': orden,
+                        'detalle': f"empieza en {inicio} y el proceso anterior lo permite desde {minimo}"
+                    })
+
+        retraso = inicio + duracion - data["fecha_entrega"]
+        if retraso > 0:
+            retrasos[str(pedido)] = max(retrasos.get(str(pedido), 0), retraso)
+        anterior = tarea
+
+    for pedido, data in pedidos.items():
+        if vistos.get(str(pedido), 0) < len(data["procesos"]):
+            violaciones.append({
+                'tipo': 'tarea_faltante', 'pedido': pedido,
+                'detalle': f"{vistos.get(str(pedido), 0)} de {len(data['procesos'])} procesos planificados"
+            })
+
+    for pedido, retraso in retrasos.items():
+        violaciones.append({'tipo': 'entrega', 'pedido': pedido, 'detalle': f"{retraso} jornadas de retraso"})
+
+    # Capacidad: en cada proceso las tareas y paradas no se solapan, salvo las
+    # tareas que ya estaban en curso en planta entre sí
+    intervalos = [
+        (tarea[5], tarea[0], tarea[0] + tarea[4], tarea[1],
+         tarea[2] in pedidos.get(str(tarea[1]), {}).get("iniciados", ()))
+        for tarea in plan
+    ]
+    for proceso, ventanas in (ventanas_bloqueadas or {}).items():
+        intervalos.extend((proceso, inicio, fin, None, False) for inicio, fin in ventanas)
+    intervalos.sort(key=lambda intervalo: (intervalo[0], intervalo[1]))
+
+    actual = None
+    for proceso, inicio, fin, pedido, iniciado in intervalos:
+        solapa = actual is not None and actual[0] == proceso and inicio < actual[2]
+        if solapa and not (iniciado and actual[4]):
+            if pedido is None or actual[3] is None:
+                violaciones.append({
+                    'tipo': 'parada', 'proceso': proceso, 'pedido': pedido if pedido is not None else actual[3],
+                    'detalle': f"coincide con una parada del proceso en [{inicio}, {min(fin, actual[2])})"
+                })
+            else:
+                violaciones.append({
+                    'tipo': 'solapamiento', 'proceso': proceso, 'pedido': pedido,
+                    'detalle': f"se solapa con el pedido {actual[3]} en [{inicio}, {min(fin, actual[2])})"
+                })
+        if actual is None or actual[0] != proceso or fin > actual[2]:
+            actual = (proceso, inicio, fin, pedido, iniciado)
+
+    return {
+        'valido': not violaciones,
+        'violaciones': violaciones,
+        'retrasos': retrasos,
+        'retraso_total': sum(retrasos.values())
+    }